@@ -0,0 +1,201 @@
+import numpy as np
+
+from .bitboard import (ALL, DOWN, FULL, JUMP_SHIFTS, RED_KING_ROW, RED_RUNAWAY_ROW, STEP_SHIFTS, UP, WHITE_KING_ROW,
+                       WHITE_RUNAWAY_ROW)
+from .constants import RED, WHITE
+from .evaluation import DEFAULT_WEIGHTS, PIECE_SQUARE, WEIGHTS
+
+# the bitboard rules on many positions at once: a batch is an (n, 3) uint64 array with one (white, red, kings)
+# row per position, and every step below works on whole columns, so the python overhead is paid per call and not
+# per position. the results are the same as BitBoard.get_all_moves and BitBoard.evaluate
+WHITE_COL, RED_COL, KINGS_COL = 0, 1, 2
+FEATURES = tuple(DEFAULT_WEIGHTS)  # columns of features(), in the order of the weights
+ROWS = [sum(1 << sq for sq in range(4 * row, 4 * row + 4)) for row in range(8)]
+CENTER = sum(1 << sq for sq in range(32) if 2 <= sq // 4 <= 5 and 2 <= 2 * (sq % 4) + (1 - (sq // 4) % 2) <= 5)
+
+
+def encode(positions):  # list of BitBoards -> batch
+    return np.array([(p.white, p.red, p.kings) for p in positions], dtype=np.uint64).reshape(-1, 3)
+
+
+def _shift(bits, shifts):
+    out = np.zeros_like(bits)
+    for mask, shift in shifts:
+        if shift > 0:
+            out |= (bits & np.uint64(mask)) << np.uint64(shift)
+        else:
+            out |= (bits & np.uint64(mask)) >> np.uint64(-shift)
+    return out
+
+
+def _lowest(bits):  # lowest set bit of every entry (0 where there is none)
+    return bits & (~bits + np.uint64(1))
+
+
+if hasattr(np, 'bitwise_count'):
+    def _count(bits):
+        return np.bitwise_count(bits).astype(np.int64)
+else:  # numpy < 2
+    _BYTE_COUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+    def _count(bits):
+        return sum(_BYTE_COUNT[(bits >> np.uint64(8 * i)) & np.uint64(0xff)] for i in range(4))
+
+
+def children(batch, white_to_move):  # all positions after one legal move, and the row of the batch each came from
+    white, red, kings = batch[:, WHITE_COL], batch[:, RED_COL], batch[:, KINGS_COL]
+    own, opp = (white, red) if white_to_move else (red, white)
+    forward, king_row = (DOWN, WHITE_KING_ROW) if white_to_move else (UP, RED_KING_ROW)
+    king_row = np.uint64(king_row)
+    empty = ~(white | red) & np.uint64(FULL)
+
+    movers = [own if d in forward else own & kings for d in ALL]
+    jumpers = np.zeros_like(own)
+    for d in ALL:
+        back = 3 - d
+        jumpers |= movers[d] & _shift(opp, STEP_SHIFTS[back]) & _shift(empty, JUMP_SHIFTS[back])
+
+    parents, owns, opps, new_kings = [], [], [], []
+
+    simple = np.nonzero(jumpers == 0)[0]  # captures are mandatory, only positions without any get simple moves
+    for d in ALL:
+        dest = _shift(movers[d][simple], STEP_SHIFTS[d]) & empty[simple]
+        while True:
+            low = _lowest(dest)
+            rows = np.nonzero(low)[0]
+            if not len(rows):
+                break
+            dest ^= low
+            to = low[rows]
+            start = _shift(to, STEP_SHIFTS[3 - d])
+            parent = simple[rows]
+            step = start | to
+            king = kings[parent]
+            was_king = (king & start) != 0
+            parents.append(parent)
+            owns.append(own[parent] ^ step)
+            opps.append(opp[parent])
+            new_kings.append(np.where(was_king, king ^ step, king | (to & king_row)))
+
+    # jumps: follow every path square by square, each entry is one path in progress
+    rows = np.nonzero(jumpers)[0]
+    bits = jumpers[rows]
+    paths = []
+    while True:
+        low = _lowest(bits)
+        some = np.nonzero(low)[0]
+        if not len(some):
+            break
+        bits ^= low
+        paths.append((rows[some], low[some]))
+    if paths:
+        parent = np.concatenate([p for p, _ in paths])
+        start = np.concatenate([s for _, s in paths])
+        square = start.copy()
+        captured = np.zeros_like(start)
+        is_king = (kings[parent] & start) != 0
+        jumps = []  # finished (parent, start, end, captured)
+        while len(parent):
+            went_on = np.zeros(len(parent), dtype=bool)
+            next_paths = []
+            for d in ALL:
+                allowed = np.ones(len(parent), dtype=bool) if d in forward else is_king
+                mid = _shift(square, STEP_SHIFTS[d])
+                land = _shift(square, JUMP_SHIFTS[d])
+                free = (empty[parent] | start) & land  # the jumping piece has left its own square
+                ok = allowed & ((opp[parent] & mid) != 0) & ((captured & mid) == 0) & (free != 0)
+                some = np.nonzero(ok)[0]
+                if not len(some):
+                    continue
+                went_on[some] = True
+                crowned = ~is_king[some] & ((land[some] & king_row) != 0)  # a man that reaches the last row stops
+                stop = some[crowned]
+                jumps.append((parent[stop], start[stop], land[stop], captured[stop] | mid[stop]))
+                go = some[~crowned]
+                next_paths.append((parent[go], start[go], land[go], captured[go] | mid[go], is_king[go]))
+            done = np.nonzero(~went_on & (captured != 0))[0]
+            jumps.append((parent[done], start[done], square[done], captured[done]))
+            if not next_paths:
+                break
+            parent, start, square, captured, is_king = (np.concatenate(column) for column in zip(*next_paths))
+
+        moves = np.unique(np.stack([np.concatenate(column).astype(np.uint64) for column in zip(*jumps)], axis=1),
+                          axis=0)  # one per result
+        parent = moves[:, 0].astype(np.int64)
+        start, end, captured = moves[:, 1], moves[:, 2], moves[:, 3]
+        king = kings[parent] & ~captured
+        was_king = (kings[parent] & start) != 0
+        step = start ^ end  # 0 when a king jumps round in a circle back to its square
+        parents.append(parent)
+        owns.append(own[parent] ^ step)
+        opps.append(opp[parent] & ~captured)
+        new_kings.append(np.where(was_king, king ^ step, king | (end & king_row)))
+
+    if not parents:
+        return np.zeros((0, 3), dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    parent = np.concatenate(parents)
+    order = np.argsort(parent, kind='stable')  # children of the same position next to each other
+    own, opp, kings = np.concatenate(owns)[order], np.concatenate(opps)[order], np.concatenate(new_kings)[order]
+    batch = np.stack((own, opp, kings) if white_to_move else (opp, own, kings), axis=1)
+    return batch, parent[order].astype(np.int64)
+
+
+def _byte_tables():  # piece-square values of every byte of a mask, so a mask is scored with four lookups
+    key = tuple(WEIGHTS.items())
+    if _byte_tables.key != key:
+        _byte_tables.key = key
+        _byte_tables.tables = {}
+        for kind, values in PIECE_SQUARE.items():
+            table = np.zeros((4, 256), dtype=np.int64)
+            for i in range(4):
+                for byte in range(256):
+                    table[i, byte] = sum(values[8 * i + bit] for bit in range(8) if byte >> bit & 1)
+            _byte_tables.tables[kind] = table
+    return _byte_tables.tables
+
+
+_byte_tables.key = None
+
+
+def _piece_square(bits, table):
+    return sum(table[i][(bits >> np.uint64(8 * i)) & np.uint64(0xff)] for i in range(4))
+
+
+def evaluate(batch):  # BitBoard.evaluate for every row, as an int64 array
+    white, red, kings = batch[:, WHITE_COL], batch[:, RED_COL], batch[:, KINGS_COL]
+    tables = _byte_tables()
+    score = (_piece_square(white & ~kings, tables[WHITE, False]) + _piece_square(white & kings, tables[WHITE, True])
+             + _piece_square(red & ~kings, tables[RED, False]) + _piece_square(red & kings, tables[RED, True]))
+    mobility, runaways = _dynamic(white, red, kings)
+    return score + WEIGHTS['mobility'] * mobility + WEIGHTS['runaway'] * runaways
+
+
+def _dynamic(white, red, kings):  # mobility and runaway counts, white's minus red's, as bitboard.dynamic_score
+    empty = ~(white | red) & np.uint64(FULL)
+    up_left, up_right, down_left, down_right = (_shift(empty, STEP_SHIFTS[3 - d]) for d in ALL)
+    white_kings, red_kings = white & kings, red & kings
+    mobility = (_count(white & down_left) + _count(white & down_right)
+                + _count(white_kings & up_left) + _count(white_kings & up_right)
+                - _count(red & up_left) - _count(red & up_right)
+                - _count(red_kings & down_left) - _count(red_kings & down_right))
+    runaways = (_count(white & ~kings & np.uint64(WHITE_RUNAWAY_ROW) & (down_left | down_right))
+                - _count(red & ~kings & np.uint64(RED_RUNAWAY_ROW) & (up_left | up_right)))
+    return mobility, runaways
+
+
+# what every weight is multiplied by in the evaluation of every row, white's minus red's, as an (n, len(FEATURES))
+# int64 array: evaluate(batch) == features(batch) @ [WEIGHTS[name] for name in FEATURES]
+def features(batch):
+    white, red, kings = batch[:, WHITE_COL], batch[:, RED_COL], batch[:, KINGS_COL]
+    white_men, red_men = white & ~kings, red & ~kings
+    rows = [(_count(white_men & np.uint64(mask)), _count(red_men & np.uint64(mask))) for mask in ROWS]
+    center = np.uint64(CENTER)
+    columns = {
+        'man': _count(white_men) - _count(red_men),
+        'king': _count(white & kings) - _count(red & kings),
+        'advance': sum(row * (white_row - rows[7 - row][1]) for row, (white_row, _) in enumerate(rows)),
+        'back_rank': rows[0][0] - rows[7][1],
+        'center': _count(white & center) - _count(red & center),
+    }
+    columns['mobility'], columns['runaway'] = _dynamic(white, red, kings)
+    return np.stack([columns[name] for name in FEATURES], axis=1)
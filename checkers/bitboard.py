@@ -0,0 +1,278 @@
+from .constants import ROWS, COLS, RED, WHITE
+from .zobrist import KEYS, bits_hash
+from .evaluation import PIECE_SQUARE, WEIGHTS, bits_score
+
+# compact board representation: the 32 dark squares are numbered 0-31 row by row (4 per row),
+# and a position is three 32 bit masks (white pieces, red pieces, kings)
+SQUARES = 32
+FULL = (1 << SQUARES) - 1
+
+ROW_COL = [(sq // 4, 2 * (sq % 4) + (1 - (sq // 4) % 2)) for sq in range(SQUARES)]  # square index -> (row, col)
+SQUARE = {rc: sq for sq, rc in enumerate(ROW_COL)}  # (row, col) -> square index
+
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))  # up left, up right, down left, down right
+UP = (0, 1)  # directions red men move in
+DOWN = (2, 3)  # directions white men move in
+ALL = (0, 1, 2, 3)  # directions kings move in
+
+RED_START = sum(1 << sq for sq in range(20, 32))  # last three rows
+WHITE_START = sum(1 << sq for sq in range(0, 12))  # first three rows
+RED_KING_ROW = sum(1 << sq for sq in range(0, 4))  # red promotes on row 0
+WHITE_KING_ROW = sum(1 << sq for sq in range(28, 32))  # white promotes on the last row
+RED_RUNAWAY_ROW = sum(1 << sq for sq in range(4, 8))  # a red man here is one step from crowning
+WHITE_RUNAWAY_ROW = sum(1 << sq for sq in range(24, 28))
+
+
+def _build_tables():  # neighbour and jump landing square for every square and direction (-1 if off the board)
+    neighbour = [[-1] * SQUARES for _ in DIRECTIONS]
+    jump = [[-1] * SQUARES for _ in DIRECTIONS]
+    for d, (dr, dc) in enumerate(DIRECTIONS):
+        for sq, (row, col) in enumerate(ROW_COL):
+            if 0 <= row + dr < ROWS and 0 <= col + dc < COLS:
+                neighbour[d][sq] = SQUARE[(row + dr, col + dc)]
+            if 0 <= row + 2 * dr < ROWS and 0 <= col + 2 * dc < COLS:
+                jump[d][sq] = SQUARE[(row + 2 * dr, col + 2 * dc)]
+    return neighbour, jump
+
+
+def _build_shifts(table):  # group squares by the index offset of their target so a whole mask can be moved at once
+    shifts = []
+    for d in range(len(DIRECTIONS)):
+        groups = {}
+        for sq, target in enumerate(table[d]):
+            if target >= 0:
+                groups[target - sq] = groups.get(target - sq, 0) | (1 << sq)
+        shifts.append(tuple((mask, shift) for shift, mask in groups.items()))
+    return shifts
+
+
+NEIGHBOUR, JUMP = _build_tables()
+STEP_SHIFTS = _build_shifts(NEIGHBOUR)
+JUMP_SHIFTS = _build_shifts(JUMP)
+
+
+def _shift(bits, shifts):  # move every set bit one step (or one jump) in a direction, dropping bits that leave the board
+    out = 0
+    for mask, shift in shifts:
+        if shift > 0:
+            out |= (bits & mask) << shift
+        else:
+            out |= (bits & mask) >> -shift
+    return out
+
+
+def dynamic_score(white, red, kings):  # the part of the evaluation that depends on more than one piece
+    empty = ~(white | red) & FULL
+    # squares whose neighbour in each direction is empty, four shifts cover mobility and runaways of both sides
+    up_left, up_right, down_left, down_right = (_shift(empty, STEP_SHIFTS[3 - d]) for d in ALL)
+    up, down = up_left | up_right, down_left | down_right
+    white_kings, red_kings = white & kings, red & kings
+    mobility = ((white & down_left).bit_count() + (white & down_right).bit_count()
+                + (white_kings & up_left).bit_count() + (white_kings & up_right).bit_count()
+                - (red & up_left).bit_count() - (red & up_right).bit_count()
+                - (red_kings & down_left).bit_count() - (red_kings & down_right).bit_count())
+    runaways = (white & ~kings & WHITE_RUNAWAY_ROW & down).bit_count() - (red & ~kings & RED_RUNAWAY_ROW & up).bit_count()
+    return WEIGHTS['mobility'] * mobility + WEIGHTS['runaway'] * runaways
+
+
+def _squares(bits):  # yield the index of every set bit
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# the rules, on the three masks of a position so the bitboard and the ui's Board share them. steps and jumps come from
+# NEIGHBOUR and JUMP, built once above, so nothing here looks at rows and columns
+def _sides(white, red, color):  # own pieces, enemy pieces, forward directions and promotion row for a color
+    if color == WHITE:
+        return white, red, DOWN, WHITE_KING_ROW
+    return red, white, UP, RED_KING_ROW
+
+
+def get_jumpers(white, red, kings, color):  # mask of pieces that can capture, found with shifts over the whole board
+    own, opp, forward, _ = _sides(white, red, color)
+    empty = ~(white | red) & FULL
+    jumpers = 0
+    for d in ALL:
+        movers = own if d in forward else own & kings
+        back = 3 - d  # opposite direction
+        jumpers |= movers & _shift(opp, STEP_SHIFTS[back]) & _shift(empty, JUMP_SHIFTS[back])
+    return jumpers
+
+
+def legal_moves(white, red, kings, color):  # every legal move for a color as (start, end, captured mask)
+    jumpers = get_jumpers(white, red, kings, color)
+    if jumpers:  # captures are mandatory
+        return _get_jumps(white, red, kings, color, jumpers)
+
+    own, _, forward, _ = _sides(white, red, color)
+    empty = ~(white | red) & FULL
+    moves = []
+    for d in ALL:
+        movers = own if d in forward else own & kings
+        back = NEIGHBOUR[3 - d]
+        for end in _squares(_shift(movers, STEP_SHIFTS[d]) & empty):
+            moves.append((back[end], end, 0))
+    return moves
+
+
+def _get_jumps(white, red, kings, color, jumpers):
+    _, opp, forward, king_row = _sides(white, red, color)
+    moves = []
+    for start in _squares(jumpers):
+        empty = ~(white | red) & FULL | (1 << start)  # the jumping piece leaves its square
+        if kings >> start & 1:
+            _jump_paths(start, start, ALL, 0, opp, empty, 0, moves)
+        else:
+            _jump_paths(start, start, forward, king_row, opp, empty, 0, moves)
+    if len(moves) > 1:
+        moves = list(dict.fromkeys(moves))  # different paths with the same result are the same move
+    return moves
+
+
+def _jump_paths(start, square, dirs, stop, opp, empty, captured, moves):  # follow every multi-jump to its end
+    found = False
+    for d in dirs:
+        land = JUMP[d][square]
+        if land < 0:
+            continue
+        mid = 1 << NEIGHBOUR[d][square]
+        if opp & mid and not captured & mid and empty >> land & 1:
+            found = True
+            if stop >> land & 1:  # a man that reaches the last row is crowned and the move ends
+                moves.append((start, land, captured | mid))
+            else:
+                _jump_paths(start, land, dirs, stop, opp, empty, captured | mid, moves)
+    if not found and captured:
+        moves.append((start, square, captured))
+
+
+def move_path(move):  # the squares a move lands on, one path for a capture that has several
+    return next(capture_paths(move))[1:] if move[2] else [move[1]]
+
+
+def capture_paths(move):  # yield every list of squares (start, landings..., end) a capture can take its pieces by
+    start, end, captured = move
+
+    def walk(square, left, path):
+        if not left:
+            if square == end:
+                yield path
+            return
+        for d in ALL:
+            land = JUMP[d][square]
+            if land >= 0 and left >> NEIGHBOUR[d][square] & 1:
+                yield from walk(land, left & ~(1 << NEIGHBOUR[d][square]), path + [land])
+    return walk(start, captured, [start])
+
+
+class BitBoard:
+    __slots__ = ('white', 'red', 'kings', 'hash', 'score')
+
+    def __init__(self, white=WHITE_START, red=RED_START, kings=0, hash=None, score=None):
+        self.white = white
+        self.red = red
+        self.kings = kings
+        self.hash = bits_hash(white, red, kings) if hash is None else hash  # zobrist hash, same keys as Board.hash
+        self.score = bits_score(white, red, kings) if score is None else score  # piece-square sum, as Board.score
+
+    @classmethod
+    def from_board(cls, board):  # build a bitboard from a checkers.board.Board
+        white = red = kings = 0
+        for row in board.board:
+            for piece in row:
+                if piece != 0:
+                    bit = 1 << SQUARE[(piece.row, piece.col)]
+                    if piece.color == WHITE:
+                        white |= bit
+                    else:
+                        red |= bit
+                    if piece.king:
+                        kings |= bit
+        return cls(white, red, kings)
+
+    def to_board(self):  # build a checkers.board.Board (with Piece objects) so the ui can draw this position
+        from .board import Board
+        from .piece import Piece
+
+        board = Board()
+        board.board = [[0] * COLS for _ in range(ROWS)]
+        for color, bits in ((WHITE, self.white), (RED, self.red)):
+            for sq in _squares(bits):
+                row, col = ROW_COL[sq]
+                piece = Piece(row, col, color)
+                if self.kings >> sq & 1:
+                    piece.make_king()
+                board.board[row][col] = piece
+        board.white_left, board.red_left = self.white.bit_count(), self.red.bit_count()
+        board.white_kings, board.red_kings = (self.white & self.kings).bit_count(), (self.red & self.kings).bit_count()
+        board.hash = self.hash
+        board.score = self.score
+        board.white_bits, board.red_bits, board.king_bits = self.white, self.red, self.kings
+        return board
+
+    def copy(self):
+        return BitBoard(self.white, self.red, self.kings, self.hash, self.score)
+
+    def __eq__(self, other):
+        return isinstance(other, BitBoard) and (self.white, self.red, self.kings) == (other.white, other.red, other.kings)
+
+    def __hash__(self):
+        return hash((self.white, self.red, self.kings))
+
+    def __repr__(self):
+        return 'BitBoard(white=%#010x, red=%#010x, kings=%#010x)' % (self.white, self.red, self.kings)
+
+    def evaluate(self):  # same score as Board.evaluate
+        return self.score + dynamic_score(self.white, self.red, self.kings)
+
+    def winner(self):
+        if not self.red:
+            return WHITE
+        elif not self.white:
+            return RED
+
+        return None
+
+    def get_jumpers(self, color):  # mask of pieces that can capture
+        return get_jumpers(self.white, self.red, self.kings, color)
+
+    def get_all_moves(self, color):  # every legal move for a color as (start, end, captured mask), captures are mandatory
+        return legal_moves(self.white, self.red, self.kings, color)
+
+    def move(self, move):  # return a new bitboard with the move applied
+        start, end, captured = move
+        start_bit, end_bit = 1 << start, 1 << end
+        moved = start_bit ^ end_bit  # nothing when a king's capture goes round and ends where it started
+        white, red, kings = self.white, self.red, self.kings
+        if white & start_bit:
+            white ^= moved
+            red &= ~captured
+            color, enemy, promote = WHITE, RED, WHITE_KING_ROW
+        else:
+            red ^= moved
+            white &= ~captured
+            color, enemy, promote = RED, WHITE, RED_KING_ROW
+        was_king = bool(kings & start_bit)
+        h = self.hash ^ KEYS[color, was_king][start]
+        score = self.score - PIECE_SQUARE[color, was_king][start]
+        for sq in _squares(captured):
+            h ^= KEYS[enemy, bool(kings >> sq & 1)][sq]
+            score -= PIECE_SQUARE[enemy, bool(kings >> sq & 1)][sq]
+        if was_king:
+            kings ^= moved
+        elif end_bit & promote:
+            kings |= end_bit
+        kings &= ~captured
+        h ^= KEYS[color, bool(kings & end_bit)][end]
+        score += PIECE_SQUARE[color, bool(kings & end_bit)][end]
+        return BitBoard(white, red, kings, h, score)
+
+    def get_valid_moves(self, row, col):  # moves for the piece on (row, col) in Board.get_valid_moves form, [([(row, col) landed on], [(row, col) captured])]
+        start = SQUARE.get((row, col))
+        if start is None or not (self.white | self.red) >> start & 1:
+            return []
+        color = WHITE if self.white >> start & 1 else RED
+        return [([ROW_COL[sq] for sq in move_path(move)], [ROW_COL[sq] for sq in _squares(move[2])])
+                for move in self.get_all_moves(color) if move[0] == start]
@@ -1,6 +1,8 @@
-import pygame
-from .constants import BLACK, ROWS, RED, SQUARE_SIZE, COLS, WHITE  # .relative import, use a . when importing files from the same module
+from .constants import ROWS, RED, COLS, WHITE  # .relative import, use a . when importing files from the same module
 from .piece import Piece
+from .zobrist import board_hash, piece_key, square
+from .evaluation import board_score, piece_value
+from .bitboard import ROW_COL, SQUARE, _squares, dynamic_score, legal_moves, move_path
 
 
 class Board:
@@ -9,16 +11,30 @@ class Board:
         self.red_left = self.white_left = 12  # set number of pieces for both sides
         self.red_kings = self.white_kings = 0  # set number of kings for both sides to 0
         self.create_board()  # create the board
+        self.hash = board_hash(self)  # zobrist hash, kept up to date by move and remove
+        self.score = board_score(self)  # piece-square part of evaluate, kept up to date the same way
+        self.white_bits, self.red_bits, self.king_bits = self._bits()  # occupied squares as bitboard masks, for evaluate
 
     def draw_squares(self, win):  # function to draw the squares on the screen
-        win.fill(BLACK)
-        for row in range(ROWS):
-            for col in range(row % 2, ROWS, 2):  # draw a red square every two square_sizes
-                pygame.draw.rect(win, WHITE, (row*SQUARE_SIZE, col*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))  # x, y, width, height
+        from .render import draw_squares  # pygame is only imported once something is drawn
+        draw_squares(win)
 
     def evaluate(self):  # calculate the score for the minimax algorithm
-        piece_tv = self.white_left - self.red_left + (self.white_kings * 2 - self.red_kings * 2)
-        return piece_tv
+        return self.score + dynamic_score(self.white_bits, self.red_bits, self.king_bits)
+
+    def _bits(self):
+        white = red = kings = 0
+        for row in self.board:
+            for piece in row:
+                if piece != 0:
+                    bit = 1 << square(piece.row, piece.col)
+                    if piece.color == WHITE:
+                        white |= bit
+                    else:
+                        red |= bit
+                    if piece.king:
+                        kings |= bit
+        return white, red, kings
 
     def get_all_pieces(self, color):  # get all possible moves for red or white
         pieces = []
@@ -29,16 +45,35 @@ class Board:
         return pieces
 
     def move(self, piece, row, col):
+        self.hash ^= piece_key(piece)  # take the piece out of the hash at its old square
+        self.score -= piece_value(piece)
+        self._clear_bit(piece)
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]  # swap the squares to move piece
         piece.move(row, col)  # move the piece
 
-        if row == ROWS - 1 or row == 0:  # make the piece a king if it reaches the last row
+        if (row == ROWS - 1 or row == 0) and not piece.king:  # make the piece a king if it reaches the last row
             piece.make_king()
             if piece.color == WHITE:  # add the number of total white kings if piece is white
                 self.white_kings += 1
             else:
                 self.red_kings += 1
 
+        self.hash ^= piece_key(piece)  # and put it back at the new one (possibly as a king)
+        self.score += piece_value(piece)
+        bit = 1 << square(row, col)
+        if piece.color == WHITE:
+            self.white_bits |= bit
+        else:
+            self.red_bits |= bit
+        if piece.king:
+            self.king_bits |= bit
+
+    def _clear_bit(self, piece):
+        bit = ~(1 << square(piece.row, piece.col))
+        self.white_bits &= bit
+        self.red_bits &= bit
+        self.king_bits &= bit
+
     def get_piece(self, row, col):
         return self.board[row][col]
 
@@ -63,21 +98,65 @@ class Board:
                     piece.selected = False
 
     def draw(self, win):  # draw all the pieces on the screen
-        self.draw_squares(win)
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0:
-                    piece.draw(win)
+        from .render import draw_board  # pygame is only imported once something is drawn
+        draw_board(win, self)
 
     def remove(self, pieces):
         for piece in pieces:
             self.board[piece.row][piece.col] = 0
             if piece != 0:
+                self.hash ^= piece_key(piece)
+                self.score -= piece_value(piece)
+                self._clear_bit(piece)
                 if piece.color == RED:
                     self.red_left -= 1
+                    if piece.king:
+                        self.red_kings -= 1
                 else:
                     self.white_left -= 1
+                    if piece.king:
+                        self.white_kings -= 1
+
+    def make_move(self, piece, row, col, skipped):  # apply a move in place and return what unmake_move needs to revert it
+        undo = (piece, piece.row, piece.col, piece.king, skipped, self.hash, self.score,
+                self.white_bits, self.red_bits, self.king_bits)
+        self.move(piece, row, col)
+        if skipped:
+            self.remove(skipped)
+        return undo
+
+    def unmake_move(self, undo):  # revert a move made with make_move, putting captured pieces back
+        piece, row, col, was_king, skipped, self.hash, self.score, self.white_bits, self.red_bits, self.king_bits = undo
+        for captured in skipped:
+            self.board[captured.row][captured.col] = captured
+            if captured.color == RED:
+                self.red_left += 1
+                if captured.king:
+                    self.red_kings += 1
+            else:
+                self.white_left += 1
+                if captured.king:
+                    self.white_kings += 1
+
+        if piece.king and not was_king:  # undo the promotion
+            piece.king = False
+            if piece.color == WHITE:
+                self.white_kings -= 1
+            else:
+                self.red_kings -= 1
+
+        self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
+        piece.move(row, col)
+
+    def copy(self):  # copy of the board and its pieces, much cheaper than deepcopy
+        board = Board.__new__(Board)
+        board.board = [[piece if piece == 0 else piece.copy() for piece in row] for row in self.board]
+        board.red_left, board.white_left = self.red_left, self.white_left
+        board.red_kings, board.white_kings = self.red_kings, self.white_kings
+        board.hash = self.hash
+        board.score = self.score
+        board.white_bits, board.red_bits, board.king_bits = self.white_bits, self.red_bits, self.king_bits
+        return board
 
     def winner(self):
         if self.red_left <= 0:  # return white as winner if there are no red pieces left
@@ -87,114 +166,20 @@ class Board:
 
         return None  # return None if no one wins
 
-    def filter_moves(self, moves):
-        moves = {k: v for k, v in sorted(moves.items(), key=lambda x: len(x[1]), reverse=True)}
-
-        new = {}
-        big = 0
-        for k, v in moves.items():
-
-            if len(v) == 0:
-                new[k] = v
-            else:
-                if len(v) > big:
-                    big = len(v)
-                    new[k] = v
-
-        return new
-
-    def get_valid_moves(self, piece):  # algorithm to figure out which moves are valid for the selected piece
-        moves = {}  # dict to store valid moves (key = valid move, value = captured pieces)
-
-        # get the left and right diagonals of the current piece
-        left = piece.col - 1
-        right = piece.col + 1
-        row = piece.row
-
-        # check move up or move down based on the piece's color and if piece is king
-        if piece.color == RED or piece.king:
-            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))  # check upwards 2 rows for valid moves
-            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
-
-        if piece.color == WHITE or piece.king:
-            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))  # check downwards 2 rows for valid moves
-            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
-
+    def get_all_moves(self, color):  # every legal move for red or white as (piece, (row, col), captured pieces)
+        moves = []
+        for start, end, captured in legal_moves(self.white_bits, self.red_bits, self.king_bits, color):
+            skipped = [self.get_piece(*ROW_COL[sq]) for sq in _squares(captured)]
+            moves.append((self.get_piece(*ROW_COL[start]), ROW_COL[end], skipped))
         return moves
 
-    def _traverse_left(self, start, stop, step, color, left, skipped=None):
-        if skipped is None:
-            skipped = []
-        moves = {}
-        last = []
-
-        for r in range(start, stop, step):  # r = row, step = up or down
-            if left < 0:  # if the left of the square is not in the board
-                break
-
-            current = self.board[r][left]
-            if current == 0:
-                if skipped and not last:  # if jumped once and no more pieces to jump
-                    break
-                elif skipped:  # if jumped once and can jump one more time
-                    moves[(r, left)] = last + skipped
-                else:  # if jumped once
-                    moves[(r, left)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r-3, -1)
-                    else:
-                        row = min(r+3, ROWS)
-
-                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
-                break
-
-            elif current.color == color:  # break if the pieces are the same color
-                break
-
-            else:  # set last to current location if the current piece is a different color
-                last = [current]
-
-            left -= 1
-
-        return self.filter_moves(moves)
-
-    def _traverse_right(self, start, stop, step, color, right, skipped=None):
-        if skipped is None:
-            skipped = []
-        moves = {}
-        last = []
-
-        for r in range(start, stop, step):  # r = row, step = up or down
-            if right >= COLS:  # if the left of the square is not in the board
-                break
-
-            current = self.board[r][right]
-            if current == 0:
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, right)] = last + skipped
-                else:
-                    moves[(r, right)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, -1)
-                    else:
-                        row = min(r + 3, ROWS)
-
-                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
-                break
-
-            elif current.color == color:
-                break
-
-            else:
-                last = [current]
-            right += 1
-
-        return self.filter_moves(moves)
\ No newline at end of file
+    # moves for the selected piece as [([(row, col) landed on], captured pieces)], the last square landed on is where
+    # it ends. a list and not a dict by end: two captures can start and end on the same squares and differ by the path
+    def get_valid_moves(self, piece):
+        start = SQUARE[(piece.row, piece.col)]
+        moves = []
+        for move in legal_moves(self.white_bits, self.red_bits, self.king_bits, piece.color):
+            if move[0] == start:
+                moves.append(([ROW_COL[sq] for sq in move_path(move)],
+                              [self.get_piece(*ROW_COL[sq]) for sq in _squares(move[2])]))
+        return moves
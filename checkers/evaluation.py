@@ -0,0 +1,77 @@
+import json
+
+from .constants import RED, WHITE
+
+# evaluation weights, in hundredths of a man. everything that only depends on one piece and its square is folded into
+# PIECE_SQUARE, which Board and BitBoard keep summed up as they move, the rest (mobility, runaways) is read off the
+# bitboard masks with a few shifts when a leaf is scored (see bitboard.dynamic_score)
+DEFAULT_WEIGHTS = {
+    'man': 100,
+    'king': 300,
+    'advance': 4,  # per row a man has moved towards its king row
+    'back_rank': 10,  # a man still guarding its own back row
+    'center': 5,  # any piece on the middle 4x4 squares
+    'mobility': 2,  # per simple move available
+    'runaway': 30,  # a man that can crown on its next move
+}
+WEIGHTS = dict(DEFAULT_WEIGHTS)
+PIECE_SQUARE = {}  # (color, king) -> value of that piece on each of the 32 dark squares, from white's point of view
+
+
+def _build_tables():
+    for color in (WHITE, RED):
+        sign = 1 if color == WHITE else -1
+        for king in (False, True):
+            values = []
+            for sq in range(32):
+                row, col = sq // 4, 2 * (sq % 4) + (1 - (sq // 4) % 2)
+                value = WEIGHTS['king'] if king else WEIGHTS['man']
+                if not king:
+                    advanced = row if color == WHITE else 7 - row
+                    value += WEIGHTS['advance'] * advanced
+                    if advanced == 0:
+                        value += WEIGHTS['back_rank']
+                if 2 <= row <= 5 and 2 <= col <= 5:
+                    value += WEIGHTS['center']
+                values.append(sign * value)
+            PIECE_SQUARE[color, king] = values
+
+
+_build_tables()
+
+
+def load_weights(path):  # replace the weights with the ones in a json file, before any board is made
+    with open(path) as f:
+        weights = json.load(f)
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError('unknown evaluation weights: %s' % ', '.join(sorted(unknown)))
+    WEIGHTS.update(weights)
+    _build_tables()
+
+
+def save_weights(path, weights=None):
+    with open(path, 'w') as f:
+        json.dump(WEIGHTS if weights is None else weights, f, indent=4)
+
+
+def piece_value(piece):
+    return PIECE_SQUARE[piece.color, piece.king][piece.row * 4 + piece.col // 2]
+
+
+def board_score(board):  # static part of the score of a checkers.board.Board from scratch
+    score = 0
+    for row in board.board:
+        for piece in row:
+            if piece != 0:
+                score += piece_value(piece)
+    return score
+
+
+def bits_score(white, red, kings):  # static part of the score of a position given as bitboard masks from scratch
+    score = 0
+    for color, bits in ((WHITE, white), (RED, red)):
+        for sq in range(32):
+            if bits >> sq & 1:
+                score += PIECE_SQUARE[color, bool(kings >> sq & 1)][sq]
+    return score
@@ -1,23 +1,30 @@
 import pygame
 from .constants import RED, WHITE, BLUE, SQUARE_SIZE
 from .board import Board
+from .render import Renderer
 
 
 class Game:
     def __init__(self, win):
         self._init()
         self.win = win
+        self.renderer = Renderer()  # keeps the drawn board and pieces between frames
 
-    def update(self):  # function to refresh the screen
-        self.board.draw(self.win)  # draw the board
-        self.draw_valid_moves(self.valid_moves)
-        pygame.display.update()  # update the screen
+    def update(self, marks=None):  # function to refresh the screen, only the squares that changed are drawn and updated
+        self.renderer.draw(self.win, self.board, self.valid_moves, marks)
+
+    def events(self):  # pygame.event.get() for the main loop, a window that was uncovered or restored is redrawn whole
+        events = pygame.event.get()
+        if any(event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE) for event in events):
+            self.renderer.invalidate()
+        return events
 
     def _init(self):  # make a private method _init that initializes the game
         self.selected = None
         self.board = Board()
         self.turn = RED
-        self.valid_moves = {}
+        self.valid_moves = {}  # square that can be clicked next -> the moves of the selected piece it leads to
+        self.path = None  # squares clicked along the way while several captures end on the same square
 
     def reset(self):  # function to reset the game
         self._init()
@@ -27,6 +34,7 @@ class Game:
             result = self._move(row, col)  # try to move the piece to where we pressed
             if not result:  # if not a valid square
                 self.selected = None  # reset current selection
+                self.path = None
                 self.select(row, col)
 
         piece = self.board.get_piece(row, col)
@@ -35,9 +43,11 @@ class Game:
                 self.board.clear_selected()
                 piece.selected = True  # highlight the selected piece
 
-        if piece != 0 and piece.color == self.turn:  # if the selected piece is not a placeholder and is the current turn of the player
+        if piece != 0 and piece.color == self.turn and self.path is None:  # if the selected piece is not a placeholder and is the current turn of the player
             self.selected = piece
-            self.valid_moves = self.board.get_valid_moves(piece)
+            self.valid_moves = {}
+            for move in self.board.get_valid_moves(piece):
+                self.valid_moves.setdefault(move[0][-1], []).append(move)  # clicked by where they end
             return True
 
         return False
@@ -45,17 +55,27 @@ class Game:
     def winner(self):
         return self.board.winner()
 
+    # the valid squares are empty, except where a king's capture goes round back to its own square
     def _move(self, row, col):
-        piece = self.board.get_piece(row, col)
-        if self.selected and piece == 0 and (row, col) in self.valid_moves:  # if the selected square is empty and the move is valid
-            self.board.move(self.selected, row, col)  # move the piece to the selected square
-            skipped = self.valid_moves[(row, col)]
-            if skipped:
-                self.board.remove(skipped)
-            self.change_turn()  # change the turn
-        else:
+        if not self.selected or (row, col) not in self.valid_moves:
             return False  # return false if the square is not valid
 
+        moves = self.valid_moves[(row, col)]
+        if len(moves) > 1:  # captures that end (or pass) here differ by their path, the next square clicked tells them apart
+            if self.path is None:
+                self.path = []
+            else:
+                self.path.append((row, col))
+            self.valid_moves = {}
+            for move in moves:
+                self.valid_moves.setdefault(move[0][len(self.path)], []).append(move)
+            return True
+
+        path, skipped = moves[0]
+        self.board.move(self.selected, *path[-1])  # move the piece to where the move ends
+        if skipped:
+            self.board.remove(skipped)
+        self.change_turn()  # change the turn
         return True  # return true if the square is valid
 
     def draw_valid_moves(self, moves):
@@ -65,6 +85,7 @@ class Game:
 
     def change_turn(self):  # change the player's turn
         self.valid_moves = []  # reset the valid moves
+        self.path = None
         if self.turn == RED:
             self.turn = WHITE
         else:
@@ -0,0 +1,155 @@
+import argparse
+import time
+
+from .constants import COLS, RED, ROWS, WHITE
+from .bitboard import ROW_COL, BitBoard, SQUARE
+
+try:
+    from . import batch
+except ImportError:  # numpy is optional, without it there is no batch backend
+    batch = None
+
+# perft counts the positions reached after every sequence of legal moves to a given depth, it checks a move generator
+# against known counts and doubles as a benchmark. red moves first, as in checkers.game
+START = [7, 49, 302, 1469, 7361, 36768, 179740, 845931, 3963680, 18391564]  # published 8x8 checkers perft, depth 1-10
+
+
+def from_squares(white=(), red=(), kings=()):  # build a bitboard from lists of (row, col)
+    def mask(squares):
+        return sum(1 << SQUARE[square] for square in squares)
+    return BitBoard(mask(white), mask(red), mask(kings))
+
+
+# (name, position, side to move, perft counts from depth 1). depth 1 was checked by hand, the deeper counts are what
+# the bitboard generator gave when this file was written, and reference_perft (below) gives the same
+POSITIONS = [
+    ('start', BitBoard(), RED, START),
+    ('crowned mid-jump', from_squares(white=[(5, 2)], red=[(6, 3), (6, 5), (7, 0)]), WHITE,
+     [1, 3, 5, 14, 47]),  # the man is crowned on (7, 4) and must stop although a king could jump on
+    ('king jumps', from_squares(white=[(3, 2)], red=[(2, 1), (2, 3), (4, 1), (4, 3), (6, 5)], kings=[(3, 2)]), WHITE,
+     [4, 30, 76, 468, 1293]),  # four ways out of the middle, one of them a double jump
+    ('double jumps', from_squares(white=[(2, 1), (2, 3)], red=[(3, 2), (5, 2), (5, 4)]), WHITE,
+     [3, 6, 24, 41, 103]),  # two men share the first victim and branch afterwards
+    ('circular capture', from_squares(white=[(2, 3), (0, 1)], red=[(3, 4), (5, 4), (5, 2), (3, 2), (7, 0)],
+                                      kings=[(2, 3)]), WHITE,
+     [1, 1, 6, 12, 62, 90]),  # the king takes four men round a loop and stops on its own square, to depth 4 by hand
+]
+
+
+def perft(position, color, depth):  # leaf count on a BitBoard
+    moves = position.get_all_moves(color)
+    if depth == 1:
+        return len(moves)
+    other = WHITE if color == RED else RED
+    return sum(perft(position.move(move), other, depth - 1) for move in moves)
+
+
+def board_perft(board, color, depth):  # leaf count on a checkers.board.Board, moving pieces in place
+    other = WHITE if color == RED else RED
+    count = 0
+    moves = board.get_all_moves(color)
+    if depth == 1:
+        return len(moves)
+    for piece, (row, col), skipped in moves:
+        undo = board.make_move(piece, row, col, skipped)
+        count += board_perft(board, other, depth - 1)
+        board.unmake_move(undo)
+    return count
+
+
+def batch_perft(positions, color, depth):  # leaf count with the numpy generator, one call per ply for the whole level
+    white_to_move = color == WHITE
+    for _ in range(depth):
+        positions, _ = batch.children(positions, white_to_move)
+        white_to_move = not white_to_move
+    return len(positions)
+
+
+# a plain generator on a grid, written from the rules and sharing no code with the bitboard, so perft checks the
+# rules themselves and not only that the backends agree. a grid is {(row, col): (color, king)}
+def to_grid(position):
+    return {rc: (WHITE if position.white >> sq & 1 else RED, bool(position.kings >> sq & 1))
+            for sq, rc in enumerate(ROW_COL) if (position.white | position.red) >> sq & 1}
+
+
+def reference_moves(grid, color):  # every legal move as (start, end, captured squares, crowned)
+    forward = -1 if color == RED else 1  # red starts at the bottom and moves up
+    last_row = 0 if color == RED else ROWS - 1
+    jumps, steps = [], []
+    for start, (owner, king) in grid.items():
+        if owner != color:
+            continue
+        dirs = [(dr, dc) for dr in (-1, 1) for dc in (-1, 1) if king or dr == forward]
+
+        def jump(square, captured):  # follow the captures from square, the captured pieces stay until the move ends
+            found = False
+            for dr, dc in dirs:
+                over = square[0] + dr, square[1] + dc
+                land = square[0] + 2 * dr, square[1] + 2 * dc
+                if (over in grid and grid[over][0] != color and over not in captured and 0 <= land[0] < ROWS
+                        and 0 <= land[1] < COLS and (land not in grid or land == start)):
+                    found = True
+                    if not king and land[0] == last_row:  # crowned, the move ends here
+                        jumps.append((start, land, frozenset(captured | {over}), True))
+                    else:
+                        jump(land, captured | {over})
+            if not found and captured:
+                jumps.append((start, square, frozenset(captured), False))
+
+        jump(start, frozenset())
+        for dr, dc in dirs:
+            end = start[0] + dr, start[1] + dc
+            if 0 <= end[0] < ROWS and 0 <= end[1] < COLS and end not in grid:
+                steps.append((start, end, frozenset(), not king and end[0] == last_row))
+    return list(dict.fromkeys(jumps)) if jumps else steps  # captures are mandatory, the same capture counts once
+
+
+def reference_perft(grid, color, depth):  # leaf count with reference_moves, applying the moves on the grid too
+    moves = reference_moves(grid, color)
+    if depth == 1:
+        return len(moves)
+    other = WHITE if color == RED else RED
+    count = 0
+    for start, end, captured, crowned in moves:
+        child = {square: piece for square, piece in grid.items() if square != start and square not in captured}
+        child[end] = (color, grid[start][1] or crowned)
+        count += reference_perft(child, other, depth - 1)
+    return count
+
+
+BACKENDS = {
+    'bitboard': (lambda position: position, perft),
+    'reference': (to_grid, reference_perft),  # slow, checks the rules rather than the speed
+    'board': (BitBoard.to_board, board_perft),  # the ui's Board, same rules as the bitboard but moving pieces in place
+}
+if batch is not None:
+    BACKENDS['batch'] = (lambda position: batch.encode([position]), batch_perft)
+
+
+def check(backend, depth):  # yield (name, depth, count, expected, seconds) for every position up to depth
+    convert, count_leaves = BACKENDS[backend]
+    for name, position, color, expected in POSITIONS:
+        for d in range(1, min(depth, len(expected)) + 1):
+            start = time.perf_counter()
+            count = count_leaves(convert(position), color, d)
+            yield name, d, count, expected[d - 1], time.perf_counter() - start
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='check move generators against known perft counts')
+    parser.add_argument('--depth', type=int, default=6, help='deepest perft to run')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), action='append', help='default: all of them')
+    options = parser.parse_args(args)
+
+    failed = False
+    for backend in options.backend or sorted(BACKENDS):
+        print(backend)
+        for name, depth, count, expected, seconds in check(backend, options.depth):
+            status = 'ok' if count == expected else 'MISMATCH, expected %d' % expected
+            failed |= count != expected
+            print('  %-18s depth %2d: %10d  %10.0f nodes/s  %s' % (name, depth, count, count / max(seconds, 1e-9), status))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
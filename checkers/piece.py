@@ -1,4 +1,4 @@
-from .constants import *
+from .constants import SQUARE_SIZE
 
 
 class Piece:
@@ -24,19 +24,19 @@ class Piece:
         self.king = True
 
     def draw(self, win):
-        radius = SQUARE_SIZE // 2 - self.PADDING
-        if self.selected:  # if piece is selected, draw highlight
-            pygame.draw.circle(win, GREEN, (self.x, self.y), radius + self.OUTLINE + 3)
-
-        pygame.draw.circle(win, GREY, (self.x, self.y), radius + self.OUTLINE)  # draw a bigger circle to use as outline
-        pygame.draw.circle(win, self.color, (self.x, self.y), radius)  # draw smaller circle that overlaps the bigger one to create outline
-        if self.king:
-            win.blit(CROWN, (self.x - CROWN.get_width() // 2, self.y - CROWN.get_height() // 2))  # center the crown
+        from .render import draw_piece  # pygame is only imported once something is drawn
+        draw_piece(win, self)
 
     def move(self, row, col):
         self.row = row
         self.col = col
         self.calc_pos()
 
+    def copy(self):
+        piece = Piece(self.row, self.col, self.color)
+        piece.king = self.king
+        piece.selected = self.selected
+        return piece
+
     def __repr__(self):  # create repr for piece object
         return str(self.color)  # return color of piece
@@ -0,0 +1,205 @@
+import mmap
+import os
+import re
+import struct
+
+from .constants import RED, WHITE
+from .bitboard import FULL, BitBoard, capture_paths
+
+# game records: PDN/FEN text for exchanging games, and a compact binary archive for storing lots of them.
+# standard notation numbers the dark squares 1-32 from the side of black, who moves first. here that is red, and the
+# board is the standard diagram turned round, so square n is bitboard square 32 - n
+MAGIC = b'CKGA'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB')
+GAME = struct.Struct('<HIIIBB')  # number of moves, white, red, kings, red to move, result
+MOVE = struct.Struct('<H')  # start | end << 5 | captures << 10
+CAPTURED = struct.Struct('<I')  # only after a move with captures
+RESULTS = {1: 2, 0.5: 1, 0: 0, None: 255}  # result (for red) -> byte
+RESULT_BYTES = {byte: result for result, byte in RESULTS.items()}
+PDN_RESULTS = {1: '1-0', 0.5: '1/2-1/2', 0: '0-1', None: '*'}
+PDN_RESULT_NAMES = {'1-0': 1, '2-0': 1, '1/2-1/2': 0.5, '1-1': 0.5, '0-1': 0, '0-2': 0, '*': None}
+
+
+def square_number(sq):  # bitboard square -> standard 1-32
+    return 32 - sq
+
+
+def number_square(number):
+    if not 1 <= number <= 32:
+        raise ValueError('no square %d' % number)
+    return 32 - number
+
+
+class GameRecord:  # a start position, the side to move there, the moves played and the result for red (1, 0.5, 0, None)
+    def __init__(self, start=None, turn=RED, moves=None, result=None, tags=None):
+        self.start = BitBoard() if start is None else start
+        self.turn = turn
+        self.moves = [] if moves is None else moves  # (start, end, captured mask) as in BitBoard.get_all_moves
+        self.result = result
+        self.tags = {} if tags is None else tags  # extra PDN tags such as Event or Date
+
+    def __eq__(self, other):
+        return (isinstance(other, GameRecord) and (self.start, self.turn, self.moves, self.result)
+                == (other.start, other.turn, other.moves, other.result))
+
+    def __repr__(self):
+        return 'GameRecord(%s, %d moves, result=%r)' % (to_fen(self.start, self.turn), len(self.moves), self.result)
+
+    def positions(self):  # yield (position, side to move) before every move and after the last one
+        position, turn = self.start, self.turn
+        yield position, turn
+        for move in self.moves:
+            position = position.move(move)
+            turn = WHITE if turn == RED else RED
+            yield position, turn
+
+    def to_pdn(self):
+        tags = dict(self.tags)
+        tags['Result'] = PDN_RESULTS[self.result]
+        if self.start != BitBoard() or self.turn != RED:
+            tags['FEN'] = to_fen(self.start, self.turn)
+        lines = ['[%s "%s"]' % (name, value) for name, value in tags.items()]
+        words = []
+        position, turn = self.start, self.turn
+        for i, move in enumerate(self.moves):
+            if self.turn == RED and i % 2 == 0:
+                words.append('%d.' % (i // 2 + 1))
+            elif self.turn == WHITE and i % 2 == 1:  # red's move starts the next number
+                words.append('%d.' % ((i + 1) // 2 + 1))
+            elif self.turn == WHITE and i == 0:
+                words.append('1...')
+            words.append(move_text(move, position.get_all_moves(turn)))
+            position, turn = position.move(move), WHITE if turn == RED else RED
+        words.append(PDN_RESULTS[self.result])
+        return '\n'.join(lines + ['', ' '.join(words)]) + '\n'
+
+    @classmethod
+    def from_pdn(cls, text):  # one game in PDN, moves are checked against the rules as they are read
+        tags = dict(re.findall(r'\[(\w+)\s+"([^"]*)"\]', text))
+        body = re.sub(r'\[[^\]]*\]|\{[^}]*\}|\([^)]*\)', ' ', text)
+        start, turn = parse_fen(tags.pop('FEN')) if 'FEN' in tags else (BitBoard(), RED)
+        result = PDN_RESULT_NAMES.get(tags.pop('Result', '*'))
+        game = cls(start, turn, result=result, tags=tags)
+        position = start
+        for word in body.split():
+            if word in PDN_RESULT_NAMES:
+                game.result = PDN_RESULT_NAMES[word]
+                break
+            if re.fullmatch(r'\d+\.+', word):
+                continue
+            move = parse_move(position, turn, word)
+            game.moves.append(move)
+            position = position.move(move)
+            turn = WHITE if turn == RED else RED
+        return game
+
+
+# '11-15' or '22x15'. the captures follow from the position, unless another of the legal moves (the list it came
+# from) has the same start and end: then the landing squares in between are written too, '31x22x13x6'
+def move_text(move, legal=()):
+    start, end, captured = move
+    if captured and any(other != move and other[:2] == move[:2] for other in legal):
+        return 'x'.join(str(square_number(square)) for square in next(capture_paths(move)))
+    return '%d%s%d' % (square_number(start), 'x' if captured else '-', square_number(end))
+
+
+def parse_move(position, turn, text):  # a move in PDN (11-15, 22x15, 22x15x6) that is legal in the position
+    squares = [number_square(int(number)) for number in re.split(r'[-x:]', text)]
+    legal = [move for move in position.get_all_moves(turn) if move[0] == squares[0] and move[1] == squares[-1]]
+    if len(squares) > 2:  # the path decides between captures with the same ends
+        legal = [move for move in legal if move[2] and squares in capture_paths(move)]
+    if not legal:
+        raise ValueError('illegal move %s' % text)
+    if len(legal) > 1:
+        raise ValueError('ambiguous move %s, give the squares in between' % text)
+    return legal[0]
+
+
+def to_fen(position, turn):  # PDN FEN, e.g. B:W21,22,K23:B1,2
+    def pieces(bits):
+        return ','.join(('K' if position.kings >> sq & 1 else '') + str(square_number(sq))
+                        for sq in sorted(range(32), key=square_number) if bits >> sq & 1)
+    return '%s:W%s:B%s' % ('B' if turn == RED else 'W', pieces(position.white), pieces(position.red))
+
+
+def parse_fen(text):  # -> (BitBoard, side to move)
+    text = text.strip().strip('"').rstrip('.')
+    turn, *sections = text.split(':')
+    if turn not in ('B', 'W'):
+        raise ValueError('bad FEN side to move %r' % turn)
+    masks = {'W': 0, 'B': 0}
+    kings = 0
+    for section in sections:
+        color, pieces = section[:1], section[1:]
+        if color not in masks:
+            raise ValueError('bad FEN section %r' % section)
+        for piece in filter(None, pieces.split(',')):
+            king = piece.startswith('K')
+            numbers = piece.lstrip('K').split('-')  # ranges like 1-12 are allowed
+            for number in range(int(numbers[0]), int(numbers[-1]) + 1):
+                bit = 1 << number_square(number)
+                masks[color] |= bit
+                if king:
+                    kings |= bit
+    return BitBoard(masks['W'], masks['B'], kings), RED if turn == 'B' else WHITE
+
+
+def encode(game):  # one game as archive bytes
+    parts = [GAME.pack(len(game.moves), game.start.white, game.start.red, game.start.kings, game.turn == RED,
+                       RESULTS[game.result])]
+    for start, end, captured in game.moves:
+        parts.append(MOVE.pack(start | end << 5 | captured.bit_count() << 10))
+        if captured:
+            parts.append(CAPTURED.pack(captured))
+    return b''.join(parts)
+
+
+def decode(data, offset):  # (game, offset after it) from archive bytes
+    count, white, red, kings, red_to_move, result = GAME.unpack_from(data, offset)
+    offset += GAME.size
+    moves = []
+    for _ in range(count):
+        code, = MOVE.unpack_from(data, offset)
+        offset += MOVE.size
+        captured = 0
+        if code >> 10:
+            captured, = CAPTURED.unpack_from(data, offset)
+            offset += CAPTURED.size
+        moves.append((code & 31, code >> 5 & 31, captured))
+    return GameRecord(BitBoard(white & FULL, red & FULL, kings & FULL), RED if red_to_move else WHITE, moves,
+                      RESULT_BYTES[result]), offset
+
+
+class ArchiveWriter:  # appends games to an archive file, usable as a context manager
+    def __init__(self, path):
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self.file = open(path, 'ab')
+        if new:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def write(self, game):
+        self.file.write(encode(game))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_archive(path):  # yield every game of an archive, reading it through mmap without loading the whole file
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version = FILE_HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('%s is not a version %d game archive' % (path, VERSION))
+            offset = FILE_HEADER.size
+            while offset < len(data):
+                game, offset = decode(data, offset)
+                yield game
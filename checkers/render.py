@@ -0,0 +1,118 @@
+import os
+
+import pygame
+
+from .constants import BLACK, BLUE, COLS, GREEN, GREY, HEIGHT, ROWS, SQUARE_SIZE, WHITE, WIDTH
+
+# everything that needs pygame lives here, so the rules (board, piece, bitboard) and the minimax package import without it
+CROWN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crown.png')  # next to the package, not the cwd
+
+_crown = None
+
+
+def get_crown():  # load and resize the crown image the first time a king is drawn
+    global _crown
+    if _crown is None:
+        _crown = pygame.transform.scale(pygame.image.load(CROWN_PATH), (45, 25))
+    return _crown
+
+
+def draw_squares(win):  # draw the squares on the screen
+    win.fill(BLACK)
+    for row in range(ROWS):
+        for col in range(row % 2, ROWS, 2):  # draw a red square every two square_sizes
+            pygame.draw.rect(win, WHITE, (row*SQUARE_SIZE, col*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))  # x, y, width, height
+
+
+def draw_piece(win, piece):
+    _draw_piece_at(win, piece.color, piece.king, piece.selected, piece.x, piece.y)
+
+
+def _draw_piece_at(win, color, king, selected, x, y):
+    from .piece import Piece
+
+    radius = SQUARE_SIZE // 2 - Piece.PADDING
+    if selected:  # if piece is selected, draw highlight
+        pygame.draw.circle(win, GREEN, (x, y), radius + Piece.OUTLINE + 3)
+
+    pygame.draw.circle(win, GREY, (x, y), radius + Piece.OUTLINE)  # draw a bigger circle to use as outline
+    pygame.draw.circle(win, color, (x, y), radius)  # draw smaller circle that overlaps the bigger one to create outline
+    if king:
+        crown = get_crown()
+        win.blit(crown, (x - crown.get_width() // 2, y - crown.get_height() // 2))  # center the crown
+
+
+def draw_board(win, board):  # draw the squares and all the pieces on the screen
+    draw_squares(win)
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.board[row][col]
+            if piece != 0:
+                draw_piece(win, piece)
+
+
+def search_marks(snapshot):  # square -> mark for what a minimax.observer.ThrottledObserver snapshot shows
+    marks = {}
+    for start, end in snapshot['line']:
+        marks[start] = marks[end] = 'line'
+    for square in snapshot['candidates']:
+        marks[square] = 'candidate'
+    if snapshot['piece'] is not None:
+        marks[snapshot['piece']] = 'piece'
+    return marks
+
+
+class Renderer:  # draws a game on the window, repainting only the squares that changed since the last frame
+    DOT_RADIUS = 15  # valid move marker
+    LINE_WIDTH = 5  # search marks, see search_marks
+
+    def __init__(self):
+        self.background = None  # the empty checkerboard, drawn once
+        self.sprites = {}  # (color, king, selected) -> piece drawn once on a transparent square
+        self.shown = None  # what each square showed after the last frame, None when the window has to be redrawn
+
+    def invalidate(self):  # something else drew on the window, repaint all of it next frame
+        self.shown = None
+
+    def _sprite(self, key):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+            _draw_piece_at(sprite, *key, SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, win, board, valid_moves, marks=None):  # marks as made by search_marks
+        if self.background is None:
+            self.background = pygame.Surface((WIDTH, HEIGHT))
+            draw_squares(self.background)
+        dots = set(valid_moves)
+        shown = [[None] * COLS for _ in range(ROWS)]
+        dirty = []
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board.board[row][col]
+                square = ((piece.color, piece.king, piece.selected) if piece != 0 else None, (row, col) in dots,
+                          marks.get((row, col)) if marks else None)
+                shown[row][col] = square
+                if self.shown is not None and self.shown[row][col] == square:
+                    continue
+                rect = pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+                win.blit(self.background, rect, rect)
+                if square[0] is not None:
+                    win.blit(self._sprite(square[0]), rect)
+                if square[1]:
+                    pygame.draw.circle(win, BLUE, rect.center, self.DOT_RADIUS)
+                if square[2] == 'piece':  # the piece the search is looking at
+                    pygame.draw.circle(win, GREEN, rect.center, SQUARE_SIZE // 2, self.LINE_WIDTH)
+                elif square[2] == 'candidate':  # where it can go
+                    pygame.draw.circle(win, GREEN, rect.center, self.DOT_RADIUS)
+                elif square[2] == 'line':  # the best line so far
+                    pygame.draw.rect(win, BLUE, rect, self.LINE_WIDTH)
+                dirty.append(rect)
+
+        if self.shown is None:
+            pygame.display.update()
+        elif dirty:
+            pygame.display.update(dirty)
+        self.shown = shown
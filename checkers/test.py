@@ -0,0 +1,477 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import unittest
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import ROW_COL, SQUARE, BitBoard
+from checkers.evaluation import WEIGHTS, bits_score
+from checkers.game import Game
+from checkers.perft import (POSITIONS, START, batch, batch_perft, board_perft, from_squares, perft,
+                            reference_perft, to_grid)
+from checkers.records import ArchiveWriter, GameRecord, move_text, parse_fen, parse_move, read_archive, to_fen
+from minimax import algorithm2, analysis, bench, book, tablebase, tournament
+from minimax.deepening import Budget, iterative_deepening
+from minimax.mcts import MCTS
+from minimax.observer import ThrottledObserver, squares
+from minimax.ordering import MoveOrdering
+from minimax.parallel import make_executor, parallel_minimax
+from minimax.server import MAX_QUEUED, Server, serve
+from minimax.stats import SearchStats
+from minimax.transposition import TranspositionTable, position_key
+
+
+def random_game(seed):  # up to 60 random moves from the start position
+    rng = random.Random(seed)
+    game = GameRecord(result=0.5)
+    for position, color in game.positions():
+        moves = position.get_all_moves(color)
+        if not moves or len(game.moves) == 60:
+            break
+        game.moves.append(rng.choice(moves))
+    return game
+
+
+def random_position(rng):  # (position, side to move) after 4 to 29 random moves from the start
+    position, color = BitBoard(), RED
+    for _ in range(rng.randrange(4, 30)):
+        position = position.move(rng.choice(position.get_all_moves(color)))
+        color = WHITE if color == RED else RED
+    return position, color
+
+
+class PerftTest(unittest.TestCase):
+    def test_start_position(self):  # published counts, depth 7 and deeper are left to python -m checkers.perft
+        for depth, expected in enumerate(START[:6], 1):
+            self.assertEqual(perft(BitBoard(), RED, depth), expected)
+
+    def test_tricky_positions(self):
+        for name, position, color, expected in POSITIONS[1:]:
+            for depth, count in enumerate(expected, 1):
+                self.assertEqual(perft(position, color, depth), count, '%s at depth %d' % (name, depth))
+
+    @unittest.skipIf(batch is None, 'needs numpy')
+    def test_batch_generator(self):
+        for name, position, color, expected in POSITIONS:
+            for depth, count in enumerate(expected[:6], 1):
+                self.assertEqual(batch_perft(batch.encode([position]), color, depth), count, '%s at depth %d' % (name, depth))
+
+    def test_reference_generator(self):  # the plain grid rules, which share no code with the generators above
+        for name, position, color, expected in POSITIONS:
+            for depth, count in enumerate(expected[:5], 1):
+                self.assertEqual(reference_perft(to_grid(position), color, depth), count, '%s at depth %d' % (name, depth))
+
+    def test_board_generator(self):  # the ui's Board shares the bitboard's rules
+        for name, position, color, expected in POSITIONS:
+            for depth, count in enumerate(expected[:4], 1):
+                self.assertEqual(board_perft(position.to_board(), color, depth), count, '%s at depth %d' % (name, depth))
+
+    def test_valid_moves_of_piece(self):  # a piece that cannot capture has no moves while another one can
+        board = from_squares(white=[(2, 1), (2, 5)], red=[(3, 2)]).to_board()
+        self.assertEqual(board.get_valid_moves(board.get_piece(2, 5)), [])
+        self.assertEqual(board.get_valid_moves(board.get_piece(2, 1)), [([(4, 3)], [board.get_piece(3, 2)])])
+
+    def test_select_captures_with_same_ends(self):  # the ui reaches both double jumps from 14 to 30 by their path
+        start, turn = parse_fen('B:WK10,15,17,18,25,26,28,29:B1,4,5,13,14')
+        for move, between in [((18, 2, 16448), 9), ((18, 2, 32896), 11)]:
+            game = Game(None)
+            game.board, game.turn = start.to_board(), turn
+            game.select(*ROW_COL[18])
+            self.assertEqual(set(game.valid_moves), {ROW_COL[2]})
+            game.select(*ROW_COL[2])  # two captures end here, the squares in between are offered
+            self.assertEqual(game.turn, turn)
+            self.assertEqual(set(game.valid_moves), {ROW_COL[9], ROW_COL[11]})
+            game.select(*ROW_COL[between])
+            self.assertNotEqual(game.turn, turn)
+            self.assertEqual(BitBoard.from_board(game.board), start.move(move))
+
+    def test_board_perft_restores_board(self):
+        board = BitBoard().to_board()
+        board_hash = board.hash
+        board_perft(board, RED, 4)
+        self.assertEqual(BitBoard.from_board(board), BitBoard())
+        self.assertEqual(board.hash, board_hash)
+
+
+class EvaluationTest(unittest.TestCase):
+    def test_incremental_score(self):  # the score kept up by move matches one counted from scratch, on both backends
+        rng = random.Random(0)
+        position, color = BitBoard(), RED
+        for _ in range(80):
+            moves = position.get_all_moves(color)
+            if not moves:
+                break
+            position = position.move(rng.choice(moves))
+            color = WHITE if color == RED else RED
+            self.assertEqual(position.score, bits_score(position.white, position.red, position.kings))
+
+            board = position.to_board()
+            for piece in board.get_all_pieces(color):
+                for path, skipped in board.get_valid_moves(piece):
+                    undo = board.make_move(piece, *path[-1], skipped)
+                    self.assertEqual(board.evaluate(), BitBoard.from_board(board).evaluate())
+                    board.unmake_move(undo)
+            self.assertEqual(board.evaluate(), position.evaluate())
+            if batch is not None:
+                self.assertEqual(batch.evaluate(batch.encode([position]))[0], position.evaluate())
+                weights = [WEIGHTS[name] for name in batch.FEATURES]
+                self.assertEqual(batch.features(batch.encode([position]))[0] @ weights, position.evaluate())
+
+    @unittest.skipIf(batch is None, 'needs numpy')
+    def test_tuning_lowers_loss(self):
+        from minimax import tune
+        positions = [p for seed in range(10) for p, _ in random_game(seed).positions()]
+        features = batch.features(batch.encode(positions)).astype(float)
+        results = (batch.evaluate(batch.encode(positions)) > 0).astype(float)  # as if the side ahead always won
+        start = [WEIGHTS[name] for name in batch.FEATURES]
+        weights = tune.tune(features, results, WEIGHTS, epochs=200)
+        tuned = [weights[name] for name in batch.FEATURES]
+        self.assertEqual(weights['man'], WEIGHTS['man'])
+        self.assertLess(tune.loss(features, results, tuned, tune.fit_scale(features, results, tuned)),
+                        tune.loss(features, results, start, tune.fit_scale(features, results, start)))
+
+
+class RecordsTest(unittest.TestCase):
+    def test_fen(self):
+        self.assertEqual(to_fen(BitBoard(), RED), 'B:W21,22,23,24,25,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,10,11,12')
+        self.assertEqual(parse_fen('B:W21-32:B1-12'), (BitBoard(), RED))
+        position = BitBoard(1 << 4, 1 << 27, 1 << 27)
+        self.assertEqual(parse_fen(to_fen(position, WHITE)), (position, WHITE))
+
+    def test_pdn_round_trip(self):
+        for seed in range(5):
+            game = random_game(seed)
+            self.assertEqual(GameRecord.from_pdn(game.to_pdn()), game)
+        self.assertEqual(GameRecord.from_pdn('1. 11-15 23-19 2. 8-11 1-0').moves[:1], [(21, 17, 0)])
+        game = GameRecord(turn=WHITE)  # white first: 1... then red opens move 2
+        for position, turn in game.positions():
+            if len(game.moves) == 5:
+                break
+            game.moves.append(position.get_all_moves(turn)[0])
+        self.assertEqual(re.findall(r'\d+\.+', game.to_pdn().split('\n\n')[1]), ['1...', '2.', '3.'])
+        start, turn = parse_fen('B:WK10,15,17,18,25,26,28,29:B1,4,5,13,14')  # two double jumps from 14 to 30
+        legal = start.get_all_moves(turn)
+        for move in [(18, 2, 16448), (18, 2, 32896)]:
+            self.assertIn('x', move_text(move, legal)[3:])  # the landing square in between is written
+            self.assertEqual(parse_move(start, turn, move_text(move, legal)), move)
+            game = GameRecord(start, turn, [move])
+            self.assertEqual(GameRecord.from_pdn(game.to_pdn()), game)
+        with self.assertRaises(ValueError):
+            parse_move(start, turn, '14x30')
+
+    def test_archive_round_trip(self):
+        games = [random_game(seed) for seed in range(5)]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'games.cka')
+            with ArchiveWriter(path) as writer:
+                for game in games[:3]:
+                    writer.write(game)
+            with ArchiveWriter(path) as writer:  # appending keeps the games already there
+                for game in games[3:]:
+                    writer.write(game)
+            self.assertEqual(list(read_archive(path)), games)
+
+
+class SearchTest(unittest.TestCase):
+    def test_pvs_matches_minimax(self):  # same value and best move at the same depth
+        rng = random.Random(1)
+        for _ in range(10):
+            position, color = random_position(rng)
+            for depth in (1, 2, 3, 4):
+                expected = algorithm2.minimax(position, depth, float('-inf'), float('inf'), color == WHITE, None)
+                self.assertEqual(algorithm2.pvs(position, depth, -algorithm2.INFINITY, algorithm2.INFINITY,
+                                                color == WHITE, None), expected)
+
+    @unittest.skipIf(batch is None, 'needs numpy')
+    def test_pvs_batched_plies(self):  # games that end inside the batched plies are mates like everywhere else
+        mates = 0
+        for seed in range(12):
+            for position, color in list(random_game(seed).positions())[30::10]:
+                if position.winner() is not None or not position.get_all_moves(color):
+                    continue
+                args = position, 4, -algorithm2.INFINITY, algorithm2.INFINITY, color == WHITE
+                value = algorithm2.pvs(*args)[0]
+                self.assertEqual(algorithm2.pvs(*args, batch_plies=2)[0], value)
+                mates += abs(value) > algorithm2.MATE_BOUND
+        self.assertGreater(mates, 0)
+
+    @unittest.skipIf(batch is None, 'needs numpy')
+    def test_batch_search_matches_search(self):  # whole levels at a time, no pruning, the same score
+        from minimax.batch import batch_search
+        rng = random.Random(5)
+        positions = [random_position(rng) for _ in range(6)]
+        positions += [position for seed in range(12) for position in list(random_game(seed).positions())[30::5]]
+        for position, color in positions:  # some late ones run out of pieces or moves inside the tree
+            for depth in (1, 2, 3):
+                self.assertEqual(batch_search(position, depth, color == WHITE),
+                                 algorithm2.search(position, depth, float('-inf'), float('inf'), color == WHITE))
+
+    def test_pvs_scores_wins_by_distance(self):
+        position = from_squares(white=[(3, 2)], red=[(4, 3), (6, 5)], kings=[(3, 2)])
+        value, board = algorithm2.pvs(position, 4, -algorithm2.INFINITY, algorithm2.INFINITY, True, None)
+        self.assertEqual(value, algorithm2.WIN_SCORE - 1)  # the king takes both men in one double jump
+        self.assertEqual(board.winner(), WHITE)
+
+    def test_observer_does_not_change_search(self):  # same result watched or not, and only sampled moves are kept
+        position = BitBoard()
+        table = TranspositionTable()
+        observer = ThrottledObserver(fps=1e9, position=position, max_player=False, table=table)
+        watched = iterative_deepening(position, False, observer, None, max_depth=5, table=table)
+        self.assertEqual(iterative_deepening(position, False, None, None, max_depth=5), watched)
+        self.assertGreater(observer.frames, 0)
+        snapshot = observer.snapshot()
+        self.assertIn(snapshot['piece'], ROW_COL)  # a piece somewhere in the tree
+        self.assertTrue(snapshot['candidates'])
+        best = next(move for move in position.get_all_moves(RED) if position.move(move) == watched[1])
+        self.assertEqual(snapshot['line'][0], squares(best))
+        self.assertGreater(len(snapshot['line']), 1)  # followed through the table
+        counts = table.probes, table.hits
+        observer.snapshot()
+        self.assertEqual((table.probes, table.hits), counts)  # without adding to the search's hit rate
+
+    def test_budget_keeps_finished_depth(self):  # a node or time limit ends the search with its last whole iteration
+        budget = Budget(max_nodes=3000)
+        limited = [iterative_deepening(BitBoard(), False, None, budget=budget),
+                   iterative_deepening(BitBoard(), False, None, time_limit=0.05)]
+        self.assertEqual(budget.nodes, 3001)  # stopped at the first node over the limit
+        for value, board, depth in limited:
+            self.assertTrue(1 <= depth < 64)
+            self.assertEqual(iterative_deepening(BitBoard(), False, None, None, max_depth=depth), (value, board, depth))
+
+    def test_move_ordering(self):  # the hash move, then captures by pieces taken, then killers, then history
+        position, color = parse_fen('W:W14,16,24,25,26,28,29,30:B1,7,8,10,15,21,22')
+        single, doubles = (6, 15, 1024), [(7, 28, 16909312), (7, 30, 33686528)]
+        order = MoveOrdering()
+        for first, expected in [(None, doubles + [single]), (single, [single] + doubles)]:
+            moves = algorithm2.get_all_moves(position, color, None, first, order, 3)
+            self.assertEqual([move for move, captures, child in moves], expected)
+        quiet = [((1, 5, 0), 0), ((2, 6, 0), 0), ((3, 7, 0), 0)]
+        order.cutoff((3, 7, 0), 0, 3)  # a killer at depth 3
+        order.cutoff((2, 6, 0), 0, 5)  # more history, but no killer at depth 3
+        order.cutoff((1, 5, 0), 1, 3)  # captures are ordered first anyway and not remembered
+        self.assertEqual(sorted(quiet, key=lambda move: order.score(*move, 3), reverse=True),
+                         [((3, 7, 0), 0), ((2, 6, 0), 0), ((1, 5, 0), 0)])
+
+    def test_stats_report(self):  # counters of a short search, which finds the same as without them
+        position, color = parse_fen(bench.SUITE[3][1])
+        for pvs in (False, True):
+            stats = SearchStats()
+            result = iterative_deepening(position, color == WHITE, None, None, max_depth=5, stats=stats, pvs=pvs)
+            self.assertEqual(result, iterative_deepening(position, color == WHITE, None, None, max_depth=5, pvs=pvs))
+            report = stats.report()
+            self.assertEqual(sorted(report['nodes_per_depth']), list(range(6)))  # remaining depth 0 to 5
+            self.assertTrue(all(report['nodes_per_depth'].values()))
+            self.assertEqual(sum(report['nodes_per_depth'].values()), report['nodes'])
+            self.assertEqual([(entry['depth'], entry['value']) for entry in report['iterations']][-1], (5, result[0]))
+            self.assertEqual(sum(entry['nodes'] for entry in report['iterations']), report['nodes'])
+            self.assertGreater(report['cutoffs'], 0)
+            self.assertTrue(0 < report['first_move_cutoff_rate'] <= 1)
+            self.assertTrue(0 < report['table_hit_rate'] < 1)
+
+    def test_table_keeps_results(self):  # bounds, replacement and hash moves change the work, not the answer
+        rng = random.Random(4)
+        for _ in range(8):
+            position, color = random_position(rng)
+            table = TranspositionTable(0.01)  # 64 slots, so entries keep getting replaced
+            for depth in range(1, 7):  # one table for all depths, like iterative deepening
+                table.new_search()
+                value, board = algorithm2.minimax(position, depth, float('-inf'), float('inf'), color == WHITE, None,
+                                                  table)
+                self.assertEqual(value, algorithm2.minimax(position, depth, float('-inf'), float('inf'),
+                                                           color == WHITE)[0])
+                # the same move, or one that ties with it: the hash move is tried first and keeps a tie
+                self.assertEqual(algorithm2.search(board, depth - 1, float('-inf'), float('inf'), color != WHITE),
+                                 value)
+
+    def test_parallel_matches_minimax(self):  # the root split gives the serial search's value and move
+        rng = random.Random(2)
+        with make_executor(2) as pool:
+            for _ in range(4):
+                position, color = random_position(rng)
+                for depth in (4, 1, 3, 2):  # a deeper search first, on the same workers
+                    self.assertEqual(parallel_minimax(position, depth, color == WHITE, executor=pool),
+                                     algorithm2.minimax(position, depth, float('-inf'), float('inf'), color == WHITE))
+
+    def test_mcts_finds_win_and_keeps_tree(self):
+        engine = MCTS(time_limit=None, max_playouts=200, seed=0)
+        position = from_squares(white=[(3, 2), (0, 7)], red=[(4, 3), (6, 5), (7, 0)], kings=[(3, 2)])
+        value, board = engine.search(position, True)
+        self.assertEqual(board, position.move((SQUARE[3, 2], SQUARE[7, 6], 1 << SQUARE[4, 3] | 1 << SQUARE[6, 5])))
+        reply = board.get_all_moves(RED)[0]
+        engine.search(board.move(reply), True)
+        self.assertGreater(engine.reused, 0)  # the reply was already in the tree
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_game_over_socket(self):
+        started = asyncio.get_running_loop().create_future()
+        server = asyncio.create_task(serve(port=0, workers=1, started=started.set_result))
+        host, port = await started
+        reader, writer = await asyncio.open_connection(host, port)
+
+        async def request(message):
+            writer.write(json.dumps(message).encode() + b'\n')
+            return json.loads(await reader.readline())
+
+        state = await request({'cmd': 'new', 'ai': 'white', 'engine': 'minimax2:1'})
+        self.assertEqual((state['turn'], len(state['moves'])), ('red', 7))
+        self.assertIn('error', await request({'cmd': 'move', 'session': state['session'], 'move': '11-14'}))
+        state = await request({'cmd': 'move', 'session': state['session'], 'move': '11-15', 'id': 1})
+        self.assertEqual((state['turn'], state['id']), ('white', 1))
+        event = json.loads(await reader.readline())  # the server's reply move arrives on its own
+        self.assertEqual((event['event'], event['turn'], event['played']), ('move', 'red', 2))
+        for engine in ('minimax2:0', 'minimax:-3', 'deepening:-1', 'mcts:0'):  # nothing a worker could play with
+            self.assertIn('error', await request({'cmd': 'new', 'engine': engine}))
+        writer.close()
+        server.cancel()
+
+    async def test_recovers_after_busy(self):  # a refused ai move is tried again on the next state request
+        server = Server(workers=1, max_queued=0)
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+
+        async def request(message):
+            writer.write(json.dumps(message).encode() + b'\n')
+            return json.loads(await reader.readline())
+
+        state = await request({'cmd': 'new', 'ai': 'red', 'engine': 'minimax2:1'})
+        event = json.loads(await reader.readline())
+        self.assertEqual((event['event'], event['error']), ('error', 'server busy, send state to retry'))
+        server.max_queued = MAX_QUEUED  # the queue emptied
+        self.assertEqual((await request({'cmd': 'state', 'session': state['session']}))['turn'], 'red')
+        event = json.loads(await reader.readline())
+        self.assertEqual((event['event'], event['turn'], event['played']), ('move', 'white', 1))
+        writer.close()
+        listener.close()
+        server.close()
+
+
+class TablebaseTest(unittest.TestCase):
+    def test_distances_match_search(self):  # a two piece table against pvs, which scores wins by distance too
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'endgame.tb')
+            tablebase.write(path, tablebase.generate(2), 2)
+            table = tablebase.Tablebase(path)
+            rng = random.Random(3)
+            positions = [(position, white_to_move) for material in tablebase._materials(2)
+                         for position in tablebase._positions(material) for white_to_move in (True, False)]
+            sample = rng.sample(positions, 60)
+            for position, white_to_move in sample:
+                plies = table.probe(position, white_to_move)
+                value = algorithm2.pvs(position, 8 if plies == tablebase.DRAW else plies, -algorithm2.INFINITY,
+                                       algorithm2.INFINITY, white_to_move)[0]
+                if plies == tablebase.DRAW:  # nobody can force a win, not even within 8 plies
+                    self.assertLess(abs(value), algorithm2.MATE_BOUND)
+                else:
+                    self.assertEqual(value, table.score(position, white_to_move))
+            answers = [table.probe(position, white_to_move) for position, white_to_move in sample]
+            table.close()
+            reopened = tablebase.Tablebase(path)
+            self.assertEqual([reopened.probe(position, white_to_move) for position, white_to_move in sample], answers)
+            reopened.close()
+
+
+class AnalysisTest(unittest.TestCase):
+    def test_resume_from_checkpoint(self):  # an interrupted job picks up at its checkpoint and ends up the same
+        with tempfile.TemporaryDirectory() as folder:
+            fens = os.path.join(folder, 'positions.txt')
+            with open(fens, 'w') as f:
+                positions = list(random_game(0).positions())
+                f.write('# a comment\n' + '\n'.join(to_fen(position, turn) for position, turn in positions))
+            out = os.path.join(folder, 'out.jsonl')
+            self.assertEqual(analysis.run(fens, out, ('minimax2', 2), workers=1, checkpoint_every=5), len(positions))
+            with open(out) as f:
+                full = f.read()
+            lines = full.splitlines(True)
+            with open(out, 'w') as f:  # stopped after 12 results with the checkpoint at 10, mid-way through a line
+                f.write(''.join(lines[:12]) + '{"index": 1')
+            analysis.save_checkpoint(out, 10, len(''.join(lines[:10])))
+            self.assertEqual(analysis.run(fens, out, ('minimax2', 2), workers=1), len(positions))
+            with open(out) as f:
+                self.assertEqual(f.read(), full)
+
+
+class BenchTest(unittest.TestCase):
+    def test_regressions_against_baseline(self):
+        results = bench.run([('minimax', 2), ('pvs', 3)], repeats=1, memory=False)
+        self.assertEqual(results['engines']['minimax@2']['total']['nodes'],
+                         sum(bench.tree_nodes(*parse_fen(fen), 2) for name, fen in bench.SUITE))
+        self.assertEqual(bench.compare(results, results), [])
+        baseline = json.loads(json.dumps(results))
+        baseline['engines']['pvs@3']['total']['nodes'] //= 2  # as if pvs searched half as many nodes before
+        self.assertEqual(len(bench.compare(results, baseline)), 1)
+        baseline['suite'] += 1
+        with self.assertRaises(ValueError):  # other positions, nothing to compare
+            bench.compare(results, baseline)
+
+
+class BookTest(unittest.TestCase):
+    def test_build_and_read(self):
+        entries = book.build(plies=2, depth=3, width=7, table_size_mb=1)  # every opening move and every reply
+        start = BitBoard()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'opening.book')
+            book.write(path, entries)
+            opening = book.Book(path, variety=3, seed=0)
+            try:
+                self.assertEqual(len(opening), len(entries))
+                positions = [(start, False)] + [(start.move(move), True) for move in start.get_all_moves(RED)]
+                for position, max_player in positions:
+                    moves = opening.moves(position, max_player)
+                    key = position_key(position, max_player)
+                    self.assertEqual(sorted(moves), sorted((score, (s, e, c)) for k, s, e, c, score in entries
+                                                           if k == key))
+                    scores = [score for score, move in moves]
+                    self.assertEqual(scores, sorted(scores, reverse=True))  # best first
+                reply = start.move(start.get_all_moves(RED)[0])
+                beyond = reply.move(reply.get_all_moves(WHITE)[0])  # two plies in, past what the book covers
+                self.assertEqual(opening.moves(beyond, False), [])
+                self.assertIsNone(opening.choose(beyond, False))
+
+                scored = opening.moves(start, False)
+                allowed = {start.move(move) for score, move in scored if score >= scored[0][0] - opening.variety}
+                self.assertLess(len(allowed), len(scored))  # the scores differ by more than the variety
+                chosen = {opening.choose(start, False) for _ in range(50)}
+                self.assertEqual(chosen, allowed)
+            finally:
+                opening.close()
+
+
+class TournamentTest(unittest.TestCase):
+    def test_elo(self):  # difference and 95% interval from win/draw/loss counts
+        self.assertEqual(tournament.elo(0, 0, 0), (0.0, float('-inf'), float('inf')))
+        self.assertEqual(tournament.elo(0, 4, 0), (0.0, 0.0, 0.0))  # all draws, no spread
+        self.assertEqual(tournament.elo(10, 0, 0), (float('inf'),) * 3)
+        diff, low, high = tournament.elo(5, 0, 5)
+        self.assertEqual(diff, 0.0)
+        self.assertAlmostEqual(low, -400 * math.log10(1 / (0.5 - 1.96 * 0.5 / math.sqrt(10)) - 1))
+        self.assertAlmostEqual(high, -low)
+        self.assertAlmostEqual(tournament.elo(3, 1, 0)[0], 400 * math.log10(7))  # scored 7/8
+
+    def test_report(self):  # results counted per pair whichever side each engine had, speed per engine
+        records = [{'red': 'pvs:0.1', 'white': 'minimax:2', 'result': 1.0,
+                    'stats': {'red': [10, 1.0, 5000, 1.0], 'white': [10, 0.5, 0, 0.0]}},
+                   {'red': 'minimax:2', 'white': 'pvs:0.1', 'result': 0.5,
+                    'stats': {'red': [20, 1.5, 0, 0.0], 'white': [20, 3.0, 15000, 3.0]}}]
+        self.assertEqual(tournament.report(records).split('\n'), [
+            'minimax:2 vs pvs:0.1: +0 =1 -1, elo %+.1f [%+.1f, %+.1f]' % tournament.elo(0, 1, 1),
+            'minimax:2: 0.0667 s/move, nodes not counted',
+            'pvs:0.1: 0.1333 s/move, 5000 nodes/s'])
+
+    def test_draws(self):
+        start = BitBoard()
+        opening = (start.white, start.red, start.kings, RED)
+        record = tournament.play_game(('minimax', 1), ('minimax', 1), opening, max_plies=6)
+        self.assertEqual((record['result'], record['reason'], len(record['moves'])), (0.5, 'move limit', 6))
+        kings = from_squares(white=[(0, 1)], red=[(7, 6)], kings=[(0, 1), (7, 6)])  # nobody can make progress
+        record = tournament.play_game(('minimax2', 2), ('minimax2', 2), (kings.white, kings.red, kings.kings, RED))
+        self.assertEqual((record['result'], record['reason']), (0.5, 'repetition'))
+        self.assertLess(len(record['moves']), tournament.MAX_PLIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
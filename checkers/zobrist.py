@@ -0,0 +1,35 @@
+import random
+
+from .constants import RED, WHITE
+
+# random 64 bit key for every (color, king) piece on each of the 32 dark squares, a position's hash is the
+# xor of the keys of its pieces so it can be updated with a couple of xors whenever a piece moves or is taken
+_random = random.Random(0x5eed)  # fixed seed so hashes are the same in every process
+KEYS = {(color, king): [_random.getrandbits(64) for _ in range(32)] for color in (WHITE, RED) for king in (False, True)}
+SIDE = _random.getrandbits(64)  # xored in when white is the side to move
+
+
+def square(row, col):  # index of a dark square, the same numbering as checkers.bitboard
+    return row * 4 + col // 2
+
+
+def piece_key(piece):
+    return KEYS[piece.color, piece.king][piece.row * 4 + piece.col // 2]
+
+
+def board_hash(board):  # hash a checkers.board.Board from scratch
+    h = 0
+    for row in board.board:
+        for piece in row:
+            if piece != 0:
+                h ^= piece_key(piece)
+    return h
+
+
+def bits_hash(white, red, kings):  # hash a position given as bitboard masks from scratch
+    h = 0
+    for color, bits in ((WHITE, white), (RED, red)):
+        for sq in range(32):
+            if bits >> sq & 1:
+                h ^= KEYS[color, bool(kings >> sq & 1)][sq]
+    return h
@@ -1,9 +1,20 @@
+import os
 import pygame
 from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, WHITE
 from checkers.game import Game
+from checkers.evaluation import load_weights
+from checkers.bitboard import BitBoard
 from minimax.algorithm import minimax
+from minimax.background import Worker
+from minimax.book import Book
+from minimax.mcts import MCTS
 
 FPS = 60
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening.book')  # made with python -m minimax.book
+BOOK_VARIETY = 0  # how much worse than the best book move a picked one may score
+MCTS_TIME = None  # seconds per move to play with minimax.mcts instead of minimax, None for minimax
+MCTS_WORKERS = None  # processes for the mcts playouts, None to play them in the search thread
+WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.json')  # evaluation weights, see checkers.evaluation
 
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption('Checkers')
@@ -17,33 +28,50 @@ def get_row_col_from_mouse(pos):
 
 
 def main():
+    if os.path.exists(WEIGHTS):  # before the first board is made
+        load_weights(WEIGHTS)
     run = True
     clock = pygame.time.Clock()  # use pygame.time.Clock() create clock object to cap FPS
     game = Game(WIN)
+    book = Book(BOOK, BOOK_VARIETY) if os.path.exists(BOOK) else None
+    search = None  # the ai's search, running in the background while the window stays responsive
+    mcts = MCTS(MCTS_TIME, workers=MCTS_WORKERS) if MCTS_TIME is not None else None  # keeps its tree between moves
 
     while run:
         clock.tick(FPS)  # limit FPS
 
-        if game.turn == WHITE:  # call the ai if it is white's turn
-            value, new_board = minimax(game.get_board(), 5, WHITE, game)  # run the algorithm and return best move
-            game.ai_move(new_board)  # update the board after the ai moved
+        if game.turn == WHITE and search is None:  # call the ai if it is white's turn
+            new_board = book.choose(game.get_board(), WHITE) if book is not None else None  # play from the book while it knows the position
+            if new_board is not None:
+                game.ai_move(new_board)  # update the board after the ai moved
+                game.board.clear_selected()  # clear the highlighted piece
+            elif mcts is not None:
+                search = Worker(mcts.search, BitBoard.from_board(game.get_board()), WHITE)
+            else:
+                search = Worker(minimax, BitBoard.from_board(game.get_board()), 5, WHITE, None)  # search on the compact bitboard for the best move
+
+        elif search is not None and search.done():
+            value, new_board = search.result
+            game.ai_move(new_board.to_board())  # update the board after the ai moved
             game.board.clear_selected()  # clear the highlighted piece
+            search = None
 
         if game.winner() is not None:
             print(game.winner())
             run = False
 
-        for event in pygame.event.get():
+        for event in game.events():
             if event.type == pygame.QUIT:  # terminate the main loop if the quit button is pressed
                 run = False
-
-            if event.type == pygame.MOUSEBUTTONDOWN:  # check for every mouse button press (LMB, RMB, etc)
+            if event.type == pygame.MOUSEBUTTONDOWN and game.turn != WHITE:  # check for every mouse button press (LMB, RMB, etc), the ai's turn is its own
                 pos = pygame.mouse.get_pos()
                 row, col = get_row_col_from_mouse(pos)
                 game.select(row, col)
 
         game.update()
 
+    if mcts is not None:
+        mcts.close()
     pygame.quit()  # close the application when the main loop ends
 
 
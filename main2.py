@@ -1,9 +1,26 @@
+import json
+import os
 import pygame
 from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, WHITE
 from checkers.game import Game
-from minimax.algorithm2 import minimax
+from checkers.bitboard import BitBoard
+from checkers.evaluation import load_weights
+from checkers.render import search_marks
+from minimax.background import BackgroundSearch
+from minimax.book import Book
+from minimax.stats import SearchStats
+from minimax.tablebase import Tablebase
+from minimax.transposition import TranspositionTable
 
 FPS = 60
+TABLE_SIZE_MB = 64  # memory budget for the transposition table
+THINK_TIME = 1.0  # seconds the ai may search per move
+TABLEBASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'endgame.tb')  # made with python -m minimax.tablebase
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening.book')  # made with python -m minimax.book
+BOOK_VARIETY = 0  # how much worse than the best book move a picked one may score
+SEARCH_STATS = False  # print what every search did (nodes, cutoffs, timings...) after each ai move
+SHOW_SEARCH = False  # mark the piece the ai is looking at, where it can go and the best line so far while it thinks
+WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.json')  # evaluation weights, see checkers.evaluation
 
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption('Checkers')
@@ -17,33 +34,68 @@ def get_row_col_from_mouse(pos):
 
 
 def main():
+    if os.path.exists(WEIGHTS):  # before the first board is made
+        load_weights(WEIGHTS)
     run = True
     clock = pygame.time.Clock()  # use pygame.time.Clock() create clock object to cap FPS
     game = Game(WIN)
+    table = TranspositionTable(TABLE_SIZE_MB)  # kept for the whole game so each search reuses what the last ones found
+    tablebase = Tablebase(TABLEBASE) if os.path.exists(TABLEBASE) else None  # endgames are looked up if it was built
+    book = Book(BOOK, BOOK_VARIETY) if os.path.exists(BOOK) else None
+    search = None  # the ai's search, running in the background while the window stays responsive
+    ponder = None  # search on the position we expect after the player's reply, running during the player's turn
 
     while run:
         clock.tick(FPS)  # limit FPS
 
-        if game.turn == WHITE:  # call the ai if it is white's turn
-            value, new_board = minimax(game.get_board(), 2, float('-inf'), float('inf'), WHITE, game)  # run the algorithm and return best move
-            print(value)
-            game.ai_move(new_board)  # update the board after the ai moved
+        if game.turn == WHITE and search is None:  # call the ai if it is white's turn
+            new_board = book.choose(game.get_board(), WHITE) if book is not None else None  # play from the book while it knows the position
+            if new_board is not None:
+                game.ai_move(new_board)  # update the board after the ai moved
+                game.board.clear_selected()  # clear the highlighted piece
+            else:
+                position = BitBoard.from_board(game.get_board())
+                if ponder is not None and ponder.position == position:  # the player made the move we expected
+                    search = ponder
+                    search.ponderhit()
+                else:
+                    if ponder is not None:
+                        ponder.cancel()
+                    stats = SearchStats() if SEARCH_STATS else None
+                    search = BackgroundSearch(position, WHITE, THINK_TIME, table, tablebase, stats=stats, observe=SHOW_SEARCH)  # search deeper until the time is up
+                ponder = None
+
+        elif search is not None and search.done():
+            print(search.result[0], search.depth)
+            if search.stats is not None:
+                print(json.dumps(search.stats.report(), default=str))
+            game.ai_move(search.best_board())  # update the board after the ai moved
             game.board.clear_selected()  # clear the highlighted piece
+            pygame.display.set_caption('Checkers')
+            reply = search.expected_reply()
+            if reply is not None and reply.winner() is None:  # think about our next move while the player thinks about theirs
+                ponder = BackgroundSearch(reply, WHITE, THINK_TIME, table, tablebase, ponder=True, observe=SHOW_SEARCH)
+            search = None
+
+        elif search is not None:
+            pygame.display.set_caption('Checkers - thinking: depth %d, %d nodes (esc to move now)' % (search.depth, search.budget.nodes))
 
         if game.winner() is not None:
             print(game.winner())
             run = False
 
-        for event in pygame.event.get():
+        for event in game.events():
             if event.type == pygame.QUIT:  # terminate the main loop if the quit button is pressed
                 run = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and search is not None:
+                search.stop()  # play the best move found so far
 
-            if event.type == pygame.MOUSEBUTTONDOWN:  # check for every mouse button press (LMB, RMB, etc)
+            if event.type == pygame.MOUSEBUTTONDOWN and game.turn != WHITE:  # check for every mouse button press (LMB, RMB, etc), the ai's turn is its own
                 pos = pygame.mouse.get_pos()
                 row, col = get_row_col_from_mouse(pos)
                 game.select(row, col)
 
-        game.update()
+        game.update(search_marks(search.observer.snapshot()) if search is not None and search.observer is not None else None)
 
     pygame.quit()  # close the application when the main loop ends
 
@@ -1,7 +1,5 @@
-from copy import deepcopy
-import pygame
-
 from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
 
 
 # algorithm that takes a board object, and evaluates and returns a new board with the best outcome for the ai
@@ -9,43 +7,47 @@ def minimax(position, depth, max_player, game):  # position = board, max_player
     if depth == 0 or position.winner() is not None:  # if the algorithm has reached the last layer or there is a winner
         return position.evaluate(), position
 
+    best_eval = float('-inf') if max_player else float('inf')
+    best_move = None
+    for move in get_all_moves(position, WHITE if max_player else RED, game):  # for every possible move
+        evaluation = search(move, depth-1, not max_player, game)  # evaluate that move by recursively searching it
+        if (max_player and evaluation >= best_eval) or (not max_player and evaluation <= best_eval):
+            best_eval = evaluation
+            best_move = move.copy()  # the child is only borrowed from get_all_moves, keep a copy of the best one
+
+    return best_eval, best_move
+
+
+def search(position, depth, max_player, game):  # score of a position, nothing is copied below the root
+    if depth == 0 or position.winner() is not None:  # if the algorithm has reached the last layer or there is a winner
+        return position.evaluate()
+
     if max_player:  # if maximize score
         maxEval = float('-inf')  # set maxEval to negative infinity so that the next score will be larger than it and be taken
-        best_move = None
         for move in get_all_moves(position, WHITE, game):  # for every possible move
-            evaluation = minimax(move, depth-1, False, game)[0]  # evaluate that move by recursively calling minimax
+            evaluation = search(move, depth-1, False, game)  # evaluate that move by recursively calling search
             maxEval = max(maxEval, evaluation)  # update maxEval by comparing it with the evaluation of the new move
-            if maxEval == evaluation:  # if found best move, set best move to this move
-                best_move = move
 
-        return maxEval, best_move
+        return maxEval
 
     else:  # if minimize score
-        minEval = float('inf')  # set maxEval to infinity so that the next score will be smaller than it and be taken
-        best_move = None
+        minEval = float('inf')  # set minEval to infinity so that the next score will be smaller than it and be taken
         for move in get_all_moves(position, RED, game):  # for every possible move
-            evaluation = minimax(move, depth-1, True, game)[0]  # evaluate that move by recursively calling minimax
-            minEval = max(minEval, evaluation)  # update minEval by comparing it with the evaluation of the new move
-            if minEval == evaluation:  # if found best move, set best move to this move
-                best_move = move
-
-        return minEval, best_move
-
-
-def simulate_move(piece, move, board, game, skip):
-    board.move(piece, move[0], move[1])  # move the piece to the new square
-    if skip:  # if we skipped(captured) over a piece
-        board.remove(skip)
-    return board
-
-
-def get_all_moves(board, color, game):
-    moves = []  # new board if we move the piece to a certain location
-    for piece in board.get_all_pieces(color):  # get every piece for this color
-        valid_moves = board.get_valid_moves(piece)  # and get every valid move for the pieces of that color
-        for move, skip in valid_moves.items():  # move coords, skipped(captured) piece
-            temp_board = deepcopy(board)  # make a deep copy of the board
-            temp_piece = temp_board.get_piece(piece.row, piece.col)  # make a temp piece with the copy of the board
-            new_board = simulate_move(temp_piece, move, temp_board, game, skip)  # return a new board that have made a move onto
-            moves.append(new_board)
-    return moves
+            evaluation = search(move, depth-1, True, game)  # evaluate that move by recursively calling search
+            minEval = min(minEval, evaluation)  # update minEval by comparing it with the evaluation of the new move
+
+        return minEval
+
+
+def get_all_moves(board, color, game):  # lazily yield the position after every valid move for color
+    if isinstance(board, BitBoard):  # a bitboard makes each new position from three ints, no copy needed
+        for move in board.get_all_moves(color):
+            yield board.move(move)
+        return
+
+    for piece, move, skip in board.get_all_moves(color):  # every legal move for this color, skipped(captured) pieces
+        undo = board.make_move(piece, move[0], move[1], skip)  # make the move on the board itself
+        try:
+            yield board
+        finally:
+            board.unmake_move(undo)  # and take it back once the caller is done with the position (or stops early)
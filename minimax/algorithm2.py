@@ -1,69 +1,345 @@
-from copy import deepcopy
-import pygame
+import time
+from contextlib import closing
 from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from minimax.transposition import EXACT, LOWER, UPPER, position_key
+from minimax.tablebase import WIN_SCORE
+
+INFINITY = WIN_SCORE + 1  # integer window bound for pvs, above every score
+MATE_BOUND = WIN_SCORE - 1000  # scores beyond this are wins or losses, WIN_SCORE minus the plies from the root
 
 
 # algorithm that takes a board object, and evaluates and returns a new board with the best outcome for the ai
+# table = optional TranspositionTable, order = optional MoveOrdering, budget = optional deepening.Budget,
+# tablebase = optional tablebase.Tablebase, probed for every child so the root picks the fastest tablebase win,
+# batch_plies = how many plies at the bottom of a BitBoard search run batched in numpy (minimax.batch), 0 for none,
+# stats = optional stats.SearchStats that counts and times what the search does, observer = optional
+# observer.SearchObserver that is shown what the search is doing, None (the default) when nothing watches
 def minimax(position, depth, alpha, beta, max_player,
-            game):  # position = board, max_player = minimize or maximize the score
+            observer=None, table=None, order=None, budget=None, tablebase=None, batch_plies=0, stats=None):  # position = board, max_player = minimize or maximize the score
+    if stats is not None:
+        stats.node(depth)
     if depth == 0 or position.winner() is not None:  # if the algorithm has reached the last layer or there is a winner
         return position.evaluate(), position
 
+    first = None
+    if table is not None:  # try the move the table remembers first
+        entry = table.probe(position_key(position, max_player))
+        if entry is not None:
+            first = entry[3]
+
+    alpha_start, beta_start = alpha, beta
+    best_eval = float('-inf') if max_player else float('inf')
+    best_move = best_key = None
+    with closing(get_all_moves(position, WHITE if max_player else RED, observer, first, order, depth, stats)) as moves:
+        for index, (key, captures, move) in enumerate(moves):  # for every possible move
+            evaluation = search(move, depth - 1, alpha, beta, not max_player, observer, table, order, budget, tablebase, batch_plies, stats)  # evaluate that move by recursively searching it
+            if best_key is None or (max_player and evaluation > best_eval) or (not max_player and evaluation < best_eval):
+                best_eval = evaluation
+                if stats is not None:
+                    start = time.perf_counter()
+                best_move = move.copy()  # the child is only borrowed from get_all_moves, keep a copy of the best one
+                if stats is not None:
+                    stats.copy_time += time.perf_counter() - start
+                best_key = key
+                if observer is not None:
+                    observer.best(key, evaluation)
+            if max_player:
+                alpha = max(alpha, evaluation)
+            else:
+                beta = min(beta, evaluation)
+            if beta <= alpha:
+                if order is not None:
+                    order.cutoff(key, captures, depth)
+                if stats is not None:
+                    stats.cutoff(index)
+                break  # leaving the with block puts the board back
+
+    if table is not None and best_key is not None:
+        table.store(position_key(position, max_player), depth, _bound(best_eval, alpha_start, beta_start), best_eval, best_key)
+    return best_eval, best_move
+
+
+def search(position, depth, alpha, beta, max_player, observer=None, table=None, order=None, budget=None, tablebase=None,
+           batch_plies=0, stats=None):  # score of a position, nothing is copied below the root
+    if budget is not None:
+        budget.tick()  # raises deepening.SearchTimeout once the budget is used up
+    if stats is not None:
+        stats.node(depth)
+    if tablebase is not None:  # a lookup replaces the whole subtree once few enough pieces are left
+        score = tablebase.score(position, max_player)
+        if score is not None:
+            return score
+    if depth == 0 or position.winner() is not None:  # if the algorithm has reached the last layer or there is a winner
+        return position.evaluate() if stats is None else stats.evaluate(position)
+    if depth <= batch_plies and isinstance(position, BitBoard):
+        from minimax.batch import batch_search  # numpy is only needed when batching is asked for
+        return batch_search(position, depth, max_player)
+
+    first = None
+    if table is not None:
+        hash_key = position_key(position, max_player)
+        entry = table.probe(hash_key)
+        if entry is not None:
+            entry_depth, flag, score, first = entry
+            if entry_depth >= depth:  # searched at least as deep before, use the stored score or tighten the window
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+    alpha_start, beta_start = alpha, beta
+    best_key = None
+
     if max_player:  # if maximize score
         maxEval = float(
             '-inf')  # set maxEval to negative infinity so that the next score will be larger than it and be taken
-        best_move = None
-        for move in get_all_moves(position, WHITE, game):  # for every possible move
-            evaluation = minimax(move, depth - 1, alpha, beta, False, game)[0]  # evaluate that move by recursively calling minimax
-            maxEval = max(maxEval, evaluation)  # update maxEval by comparing it with the evaluation of the new move
-            alpha = max(alpha, evaluation)
-            if maxEval == evaluation:  # if found best move, set best move to this move
-                best_move = move
+        with closing(get_all_moves(position, WHITE, observer, first, order, depth, stats)) as moves:
+            for index, (key, captures, move) in enumerate(moves):  # for every possible move
+                evaluation = search(move, depth - 1, alpha, beta, False, observer, table, order, budget, tablebase, batch_plies, stats)  # evaluate that move by recursively calling search
+                if evaluation > maxEval:
+                    best_key = key
+                maxEval = max(maxEval, evaluation)  # update maxEval by comparing it with the evaluation of the new move
+                alpha = max(alpha, evaluation)
+                if beta <= alpha:
+                    if order is not None:
+                        order.cutoff(key, captures, depth)
+                    if stats is not None:
+                        stats.cutoff(index)
+                    break  # leaving the with block puts the board back
+
+        value = maxEval
+
+    else:  # if minimize score
+        minEval = float('inf')  # set minEval to infinity so that the next score will be smaller than it and be taken
+        with closing(get_all_moves(position, RED, observer, first, order, depth, stats)) as moves:
+            for index, (key, captures, move) in enumerate(moves):  # for every possible move
+                evaluation = search(move, depth - 1, alpha, beta, True, observer, table, order, budget, tablebase, batch_plies, stats)  # evaluate that move by recursively calling search
+                if evaluation < minEval:
+                    best_key = key
+                minEval = min(minEval, evaluation)  # update minEval by comparing it with the evaluation of the new move
+                beta = min(beta, evaluation)
+                if beta <= alpha:
+                    if order is not None:
+                        order.cutoff(key, captures, depth)
+                    if stats is not None:
+                        stats.cutoff(index)
+                    break  # leaving the with block puts the board back
+
+        value = minEval
+
+    if table is not None and best_key is not None:
+        table.store(hash_key, depth, _bound(value, alpha_start, beta_start), value, best_key)
+    return value
+
+
+# principal variation search: the same result as minimax, but only the first move of every node is searched with the
+# full window. the others are searched with a null window that can only tell whether they beat the best so far, and
+# are searched again with the full window when they do. with good ordering the first move is usually best, so most
+# moves are refuted by the cheap search. scores are ints, a side without pieces or moves has lost and scores
+# WIN_SCORE minus the plies from the root, so the search prefers quicker wins and slower losses. same arguments as
+# minimax, start it with (-INFINITY, INFINITY) or an aspiration window (see deepening.iterative_deepening)
+def pvs(position, depth, alpha, beta, max_player, observer=None, table=None, order=None, budget=None, tablebase=None,
+        batch_plies=0, stats=None):  # returns (value, new board) like minimax
+    if stats is not None:
+        stats.node(depth)
+    if position.winner() is not None:
+        return _mate(position.winner() == WHITE, 0), position
+    if depth == 0:
+        return position.evaluate(), position
+
+    first = None
+    if table is not None:
+        entry = table.probe(position_key(position, max_player))
+        if entry is not None:
+            first = entry[3]
+
+    alpha_start, beta_start = alpha, beta
+    best_eval = best_move = best_key = None
+    with closing(get_all_moves(position, WHITE if max_player else RED, observer, first, order, depth, stats)) as moves:
+        for index, (key, captures, move) in enumerate(moves):
+            evaluation = _pvs_child(move, depth, alpha, beta, max_player, index, observer, table, order, budget,
+                                    tablebase, batch_plies, stats, 1)
+            if best_key is None or (max_player and evaluation > best_eval) or (not max_player and evaluation < best_eval):
+                best_eval = evaluation
+                best_move = move.copy()  # the child is only borrowed from get_all_moves, keep a copy of the best one
+                best_key = key
+                if observer is not None:
+                    observer.best(key, evaluation)
+            if max_player:
+                alpha = max(alpha, evaluation)
+            else:
+                beta = min(beta, evaluation)
             if beta <= alpha:
+                if order is not None:
+                    order.cutoff(key, captures, depth)
+                if stats is not None:
+                    stats.cutoff(index)
                 break
 
-        return maxEval, best_move
+    if best_key is None:  # no moves, lost
+        return _mate(not max_player, 0), None
+    if table is not None:
+        table.store(position_key(position, max_player), depth, _bound(best_eval, alpha_start, beta_start), best_eval,
+                    best_key)
+    return best_eval, best_move
 
-    else:  # if minimize score
-        minEval = float('inf')  # set maxEval to infinity so that the next score will be smaller than it and be taken
-        best_move = None
-        for move in get_all_moves(position, RED, game):  # for every possible move
-            evaluation = minimax(move, depth - 1, alpha, beta, True, game)[0]  # evaluate that move by recursively calling minimax
-            minEval = min(minEval, evaluation)  # update minEval by comparing it with the evaluation of the new move
-            beta = min(beta, evaluation)
-            if minEval == evaluation:  # if found best move, set best move to this move
-                best_move = move
+
+def pvs_search(position, depth, alpha, beta, max_player, observer=None, table=None, order=None, budget=None,
+               tablebase=None, batch_plies=0, stats=None, ply=0):  # score of a position ply plies below the root
+    if budget is not None:
+        budget.tick()
+    if stats is not None:
+        stats.node(depth)
+    if tablebase is not None:
+        score = tablebase.score(position, max_player)
+        if score is not None:
+            return _from_table(score, ply)  # tablebase wins count plies from this position
+    if position.winner() is not None:
+        return _mate(position.winner() == WHITE, ply)
+    if depth == 0:
+        return position.evaluate() if stats is None else stats.evaluate(position)
+    if depth <= batch_plies and isinstance(position, BitBoard):
+        from minimax.batch import batch_search
+        return batch_search(position, depth, max_player, ply)  # with ply, games that end in the batch are mates too
+
+    first = None
+    if table is not None:
+        hash_key = position_key(position, max_player)
+        entry = table.probe(hash_key)
+        if entry is not None:
+            entry_depth, flag, score, first = entry
+            score = _from_table(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+    alpha_start, beta_start = alpha, beta
+
+    best_eval = best_key = None
+    with closing(get_all_moves(position, WHITE if max_player else RED, observer, first, order, depth, stats)) as moves:
+        for index, (key, captures, move) in enumerate(moves):
+            evaluation = _pvs_child(move, depth, alpha, beta, max_player, index, observer, table, order, budget,
+                                    tablebase, batch_plies, stats, ply + 1)
+            if best_key is None or (max_player and evaluation > best_eval) or (not max_player and evaluation < best_eval):
+                best_eval, best_key = evaluation, key
+            if max_player:
+                alpha = max(alpha, evaluation)
+            else:
+                beta = min(beta, evaluation)
             if beta <= alpha:
+                if order is not None:
+                    order.cutoff(key, captures, depth)
+                if stats is not None:
+                    stats.cutoff(index)
                 break
 
-        return minEval, best_move
-
-
-def simulate_move(piece, move, board, game, skip):
-    board.move(piece, move[0], move[1])  # move the piece to the new square
-    if skip:  # if we skipped(captured) over a piece
-        board.remove(skip)
-    return board
-
-
-def get_all_moves(board, color, game):
-    moves = []  # new board if we move the piece to a certain location
-    for piece in board.get_all_pieces(color):  # get every piece for this color
-        valid_moves = board.get_valid_moves(piece)  # and get every valid move for the pieces of that color
-        for move, skip in valid_moves.items():  # move coords, skipped(captured) piece
-            draw_moves(game, board, piece)
-            temp_board = deepcopy(board)  # make a deep copy of the board
-            temp_piece = temp_board.get_piece(piece.row, piece.col)  # make a temp piece with the copy of the board
-            new_board = simulate_move(temp_piece, move, temp_board, game,
-                                      skip)  # return a new board that have made a move onto
-            moves.append(new_board)
-    return moves
-
-
-def draw_moves(game, board, piece):
-    valid_moves = board.get_valid_moves(piece)
-    board.draw(game.win)
-    pygame.draw.circle(game.win, (0, 255, 0), (piece.x, piece.y), 50, 5)
-    game.draw_valid_moves(valid_moves.keys())
-    pygame.display.update()
-    # pygame.time.delay(100)
+    if best_key is None:  # no moves, lost
+        return _mate(not max_player, ply)
+    if table is not None:
+        table.store(hash_key, depth, _bound(best_eval, alpha_start, beta_start), _to_table(best_eval, ply), best_key)
+    return best_eval
+
+
+def _pvs_child(move, depth, alpha, beta, max_player, index, observer, table, order, budget, tablebase, batch_plies, stats,
+               ply):  # score of the index-th child of a pvs node with the window (alpha, beta)
+    args = observer, table, order, budget, tablebase, batch_plies, stats, ply
+    if index == 0:  # the expected best move gets the full window
+        return pvs_search(move, depth - 1, alpha, beta, not max_player, *args)
+    if max_player:  # can it get above alpha?
+        evaluation = pvs_search(move, depth - 1, alpha, alpha + 1, False, *args)
+    else:  # can it get below beta?
+        evaluation = pvs_search(move, depth - 1, beta - 1, beta, True, *args)
+    if alpha < evaluation < beta:  # it can, find out by how much
+        if stats is not None:
+            stats.research()
+        evaluation = pvs_search(move, depth - 1, alpha, beta, not max_player, *args)
+    return evaluation
+
+
+def _mate(white_wins, ply):  # score of a finished game, from white's point of view
+    return WIN_SCORE - ply if white_wins else ply - WIN_SCORE
+
+
+def _to_table(score, ply):  # the table keeps wins as plies from the stored position, not from the root
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def _bound(value, alpha, beta):  # what a score found with the window (alpha, beta) tells us about the real value
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+
+# lazily yield (move, pieces captured, position) for every valid move for color, trying first before the others and
+# sorting the rest with order if given. close the generator to take back the move currently on the board. observer
+# (see minimax.observer) is told about every move before it is yielded
+def get_all_moves(board, color, observer, first=None, order=None, depth=0, stats=None):
+    if stats is not None:
+        start = time.perf_counter()
+    if isinstance(board, BitBoard):  # a bitboard makes each new position from three ints, no copy needed
+        moves = [(move, move[2].bit_count()) for move in board.get_all_moves(color)]
+    else:
+        moves = []
+        for piece, move, skip in board.get_all_moves(color):  # move coords, skipped(captured) pieces
+            moves.append((((piece.row, piece.col), move), len(skip), piece, skip))
+
+    if order is not None:
+        moves.sort(key=lambda move: order.score(move[0], move[1], depth, first), reverse=True)
+    elif first is not None:
+        moves.sort(key=lambda move: move[0] != first)
+    if stats is not None:
+        stats.generation_time += time.perf_counter() - start
+    keys = [move[0] for move in moves] if observer is not None else None
+
+    if isinstance(board, BitBoard):
+        for move, captures in moves:
+            if observer is not None:
+                observer.consider(move, keys)
+            if stats is None:
+                yield move, captures, board.move(move)
+                continue
+            start = time.perf_counter()
+            child = board.move(move)
+            stats.copy_time += time.perf_counter() - start
+            yield move, captures, child
+        return
+
+    for key, captures, piece, skip in moves:
+        if observer is not None:
+            observer.consider(key, keys)
+        if stats is not None:
+            start = time.perf_counter()
+        undo = board.make_move(piece, key[1][0], key[1][1], skip)  # make the move on the board itself
+        if stats is not None:
+            stats.copy_time += time.perf_counter() - start
+        try:
+            yield key, captures, board
+        finally:
+            if stats is not None:
+                start = time.perf_counter()
+            board.unmake_move(undo)  # and take it back once the caller is done with the position (or stops early)
+            if stats is not None:
+                stats.copy_time += time.perf_counter() - start
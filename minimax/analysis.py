@@ -0,0 +1,161 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from checkers.constants import WHITE
+from checkers.bitboard import BitBoard
+from checkers.records import MAGIC, move_text, parse_fen, read_archive, to_fen
+from minimax import algorithm2
+from minimax.deepening import Budget, iterative_deepening
+from minimax.mcts import MCTS
+from minimax.tablebase import WIN_SCORE
+from minimax.tournament import parse_engine
+from minimax.workers import make_pool, worker_table
+
+# bulk analysis: score and best move for every position of a file, on a process pool, written as json lines in
+# the order of the input. the input is a text file with one FEN per line (blank lines and # comments are skipped)
+# or a game archive (checkers.records), which gives every position of every game. progress is checkpointed next to
+# the output, so a job that is stopped starts again where it was
+CHECKPOINT_EVERY = 1000  # results between checkpoints
+REPORT_EVERY = 5.0  # seconds between progress lines
+IN_FLIGHT = 4  # positions per worker sent ahead, so the pool never waits for the reader
+WORKER_TABLE_MB = 16
+
+
+def read_positions(path):  # yield (position, side to move) from a FEN file or a game archive
+    with open(path, 'rb') as f:
+        archive = f.read(len(MAGIC)) == MAGIC
+    if archive:
+        for game in read_archive(path):
+            yield from game.positions()
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield parse_fen(line)
+
+
+# score of a position from white's point of view (WIN_SCORE for a won game, mcts gives the expected result for
+# white), the best move and how deep it searched and how many nodes (or playouts). table is a TranspositionTable
+# kept between positions, engine as in minimax.tournament, minimax:DEPTH runs algorithm2 like minimax2:DEPTH
+def analyse(position, turn, engine, table=None):
+    kind, arg = engine
+    max_player = turn == WHITE
+    moves = position.get_all_moves(turn)
+    if position.winner() is not None or not moves:
+        white_won = position.winner() == WHITE if position.winner() is not None else not max_player
+        return {'score': WIN_SCORE if white_won else -WIN_SCORE, 'best': None, 'depth': 0, 'nodes': 0}
+    budget = Budget()
+    if kind == 'mcts':
+        engine = MCTS(arg)
+        value, new_position = engine.search(position, max_player)
+        value = value if max_player else 1 - value
+        depth, nodes = None, engine.playouts
+    elif kind in ('minimax', 'minimax2'):
+        if table is not None:
+            table.new_search()
+        value, new_position = algorithm2.minimax(position, arg, float('-inf'), float('inf'), max_player, None, table,
+                                                 budget=budget)
+        depth, nodes = arg, budget.nodes
+    else:
+        budget = Budget(time_limit=arg)
+        value, new_position, depth = iterative_deepening(position, max_player, None, table=table, budget=budget,
+                                                         pvs=kind == 'pvs')
+        nodes = budget.nodes
+    best = next(move for move in moves if position.move(move) == new_position)
+    if value in (float('inf'), float('-inf')):  # minimax scores a side without moves as infinitely bad
+        value = WIN_SCORE if value > 0 else -WIN_SCORE
+    return {'score': value, 'best': move_text(best, moves), 'depth': depth, 'nodes': nodes}
+
+
+def _analyse(job):  # one output line, in a worker of run's pool
+    index, white, red, kings, turn, engine = job
+    position = BitBoard(white, red, kings)
+    table = worker_table()
+    table.clear()  # entries left by other positions would make a result depend on which worker got it after what
+    return dict(index=index, fen=to_fen(position, turn), **analyse(position, turn, engine, table))
+
+
+def ordered_map(executor, function, jobs, in_flight):  # executor.map that only reads in_flight jobs ahead
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(function, job))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_checkpoint(out):  # (positions done, bytes of the output they fill), or (0, 0) for a new job
+    try:
+        with open(out + '.checkpoint') as f:
+            checkpoint = json.load(f)
+        return checkpoint['done'], checkpoint['bytes']
+    except FileNotFoundError:
+        return 0, 0
+
+
+def save_checkpoint(out, done, size):  # written to a temporary file and renamed, so a checkpoint is never half written
+    path = out + '.checkpoint'
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'done': done, 'bytes': size}, f)
+    os.replace(path + '.tmp', path)
+
+
+# analyse every position of path with engine and write the results to out, resuming from out's checkpoint if it
+# has one (an output without one is started again). the output is cut back to the last checkpoint first, so
+# results written after it are not repeated
+def run(path, out, engine, workers=None, checkpoint_every=CHECKPOINT_EVERY, report=None):
+    workers = workers or os.cpu_count() or 1
+    done, size = load_checkpoint(out)
+    mode = 'r+' if os.path.exists(out) else 'w'
+    with open(out, mode) as f, make_pool(workers, WORKER_TABLE_MB) as pool:
+        f.seek(size)
+        f.truncate()
+        positions = itertools.islice(enumerate(read_positions(path)), done, None)  # skip what is already done
+        jobs = ((index, position.white, position.red, position.kings, turn, engine)
+                for index, (position, turn) in positions)
+        started = last_report = time.perf_counter()
+        count = 0
+        for line in ordered_map(pool, _analyse, jobs, workers * IN_FLIGHT):
+            f.write(json.dumps(line) + '\n')
+            count += 1
+            if (done + count) % checkpoint_every == 0:
+                f.flush()
+                os.fsync(f.fileno())
+                save_checkpoint(out, done + count, f.tell())
+            now = time.perf_counter()
+            if report is not None and now - last_report >= REPORT_EVERY:
+                last_report = now
+                report(done + count, count / (now - started), workers)
+        f.flush()
+        os.fsync(f.fileno())
+        save_checkpoint(out, done + count, f.tell())
+    return done + count
+
+
+def _print_progress(done, rate, workers):
+    print('%d positions, %.1f positions/s, %.1f per core' % (done, rate, rate / workers), file=sys.stderr)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='score every position of a FEN file or game archive')
+    parser.add_argument('input', help='one FEN per line, or a game archive')
+    parser.add_argument('--out', default='analysis.jsonl', help='json lines output, resumed if it has a checkpoint')
+    parser.add_argument('--engine', type=parse_engine, default=parse_engine('minimax2:6'),
+                        help='minimax2:DEPTH, deepening:SECONDS, pvs:SECONDS or mcts:SECONDS')
+    parser.add_argument('--workers', type=int, default=None, help='processes, default one per core')
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY, help='results between checkpoints')
+    options = parser.parse_args(args)
+    total = run(options.input, options.out, options.engine, options.workers, options.checkpoint_every,
+                _print_progress)
+    print('%d positions analysed' % total, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import threading
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from minimax.deepening import Budget, iterative_deepening
+from minimax.observer import ThrottledObserver
+from minimax.transposition import position_key
+
+
+class Worker:  # runs function(*args) in a daemon thread so the game loop can poll it every frame instead of waiting
+    def __init__(self, function, *args, **kwargs):
+        self.result = None
+        self.thread = threading.Thread(target=self._run, args=(function, args, kwargs), daemon=True)
+        self.thread.start()
+
+    def _run(self, function, args, kwargs):
+        self.result = function(*args, **kwargs)
+
+    def done(self):
+        return not self.thread.is_alive()
+
+
+# iterative deepening on a bitboard in the background. the ui reads depth, value and budget.nodes to show progress,
+# calls stop() to play the best move found so far, and gets the result once done(). a ponder search has no time
+# limit and runs until it is stopped, or until ponderhit() turns it into a normal search with time_limit from then on.
+# with observe=True the ui can draw what the search is looking at from observer.snapshot() (see minimax.observer)
+class BackgroundSearch(Worker):
+    def __init__(self, position, max_player, time_limit, table, tablebase=None, ponder=False, stats=None,
+                 observe=False):
+        self.position = position if isinstance(position, BitBoard) else BitBoard.from_board(position)
+        self.max_player = max_player
+        self.time_limit = time_limit
+        self.ponder = ponder
+        self.budget = Budget(None if ponder else time_limit)
+        self.depth = 0
+        self.value = None
+        self.table = table
+        self.stats = stats
+        self.observer = ThrottledObserver(position=self.position, max_player=max_player, table=table) if observe else None
+        super().__init__(iterative_deepening, self.position, max_player, self.observer, table=table, tablebase=tablebase,
+                         budget=self.budget, on_iteration=self._on_iteration, stats=stats)
+
+    def _on_iteration(self, depth, value, position):
+        self.depth, self.value = depth, value
+
+    def stop(self):
+        self.budget.stop()
+
+    def cancel(self):  # stop and wait for the thread, so nothing else writes to the table at the same time
+        self.budget.stop()
+        self.thread.join()
+
+    def ponderhit(self):  # the opponent played the move we pondered on, search on as if it had just started
+        self.ponder = False
+        self.budget.extend(self.time_limit)
+
+    def best_board(self):  # the position after the move found, as a Board for the ui
+        return self.result[1].to_board()
+
+    def expected_reply(self):  # the position after the opponent's best answer to our move, if the table knows it
+        position = self.result[1]
+        entry = self.table.probe(position_key(position, not self.max_player))
+        if entry is None or entry[3] not in position.get_all_moves(RED if self.max_player else WHITE):
+            return None
+        return position.move(entry[3])
@@ -0,0 +1,48 @@
+import numpy as np
+
+from checkers import batch
+from minimax.tablebase import WIN_SCORE
+
+
+# full width minimax over the last plies of a search, a whole level at a time: every position of a level is expanded
+# with one batch.children call and all the leaves are scored with one batch.evaluate call, then the scores are
+# folded back up with np.maximum/np.minimum.reduceat. there is no pruning in these plies, but no python code runs
+# per position either. gives the same score as algorithm2.search on a BitBoard, or with ply (the plies from the root
+# to position) the same as algorithm2.pvs_search: finished games score WIN_SCORE minus the plies to them
+def batch_search(position, depth, max_player, ply=None):
+    levels = []  # (positions, side to maximise, which are finished, row of the next level each child came from)
+    positions = batch.encode([position])
+    maximise = bool(max_player)
+    for _ in range(depth):
+        finished = (positions[:, batch.WHITE_COL] == 0) | (positions[:, batch.RED_COL] == 0)  # somebody has won
+        playing = np.nonzero(~finished)[0]
+        children, parents = batch.children(positions[playing], maximise)
+        levels.append((positions, maximise, finished, playing[parents]))
+        positions = children
+        maximise = not maximise
+
+    scores = batch.evaluate(positions).astype(np.float64)
+    if ply is not None:
+        finished = (positions[:, batch.WHITE_COL] == 0) | (positions[:, batch.RED_COL] == 0)
+        scores[finished] = _mates(positions[finished], ply + depth)
+    for level, (positions, maximise, finished, parents) in reversed(list(enumerate(levels))):
+        if ply is None:
+            values = np.full(len(positions), float('-inf') if maximise else float('inf'))  # no moves loses, as in search
+        else:
+            mate = WIN_SCORE - (ply + level)
+            values = np.full(len(positions), float(-mate if maximise else mate))
+        if len(parents):
+            has_children, starts = np.unique(parents, return_index=True)  # parents are sorted, children are grouped
+            reduce = np.maximum if maximise else np.minimum
+            values[has_children] = reduce.reduceat(scores, starts)
+        if finished.any():
+            values[finished] = batch.evaluate(positions[finished]) if ply is None else _mates(positions[finished],
+                                                                                                ply + level)
+        scores = values
+
+    score = scores[0]
+    return int(score) if np.isfinite(score) else float(score)
+
+
+def _mates(positions, ply):  # scores of finished games ply plies from the root, white's point of view
+    return np.where(positions[:, batch.RED_COL] == 0, WIN_SCORE - ply, ply - WIN_SCORE).astype(np.float64)
@@ -0,0 +1,175 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from checkers.constants import RED, WHITE
+from checkers.records import parse_fen
+from minimax import algorithm, algorithm2
+from minimax.deepening import Budget, iterative_deepening
+from minimax.transposition import TranspositionTable
+
+# engine benchmark: every engine searches every position of a fixed suite to a fixed depth, and the time, nodes,
+# nodes per second and peak memory are written as json. compared with a baseline from an earlier run (on the same
+# machine, timings are not portable) it fails with exit code 1 when an engine got slower, searched more nodes or
+# used more memory than the threshold allows. the positions are versioned: change them and SUITE_VERSION goes up,
+# and older baselines are refused instead of compared
+SUITE_VERSION = 1
+SUITE = [  # (name, FEN), from seeded random games
+    ('opening 1', 'B:W18,19,21,22,25,26,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,11,14'),
+    ('opening 2', 'B:W19,21,24,25,26,27,28,29,30,31,32:B1,2,3,4,6,7,8,10,12,14,16'),
+    ('opening 3', 'B:W17,18,23,24,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,10,12,13'),
+    ('middlegame 1', 'B:W10,15,21,26,28,29,31,32:B1,2,3,4,9,12,19'),
+    ('middlegame 2', 'B:W6,7,25,27,29,30,31,32:B1,4,5,10,21,28'),
+    ('middlegame 3', 'B:W5,18,24,25,26,29,30:B1,2,3,4,7,11,27'),
+    ('captures 1', 'B:W17,18,19,21,24,25,26,27,28,30:B1,3,6,7,8,10,11,14,15,20'),
+    ('captures 2', 'B:W10,21,25,27,28,30:B1,3,6,7,8,18,20,K31'),
+    ('captures 3', 'W:W13,20,21,22,23,25,28,29:B1,2,5,10,11,12,18'),
+    ('endgame 1', 'W:WK5,K8,13,17:BK2'),
+    ('endgame 2', 'B:WK4:B1,6,9,17,K29'),
+    ('endgame 3', 'W:WK2,K3,13,14:B5,K15'),
+]
+KINDS = ('minimax', 'minimax2', 'deepening', 'pvs')  # algorithm.minimax, algorithm2.minimax, deepening, with pvs
+ENGINES = ('minimax@5', 'minimax2@8', 'deepening@9', 'pvs@9')
+REPEATS = 3  # runs per position, the fastest counts
+THRESHOLD = 0.10  # how much worse than the baseline a total may get
+TABLE_SIZE_MB = 4
+
+
+# 'pvs@7' -> ('pvs', 7). every engine searches to a fixed depth here, written with @ so it is never mistaken for the
+# kind:SECONDS of minimax.tournament, where deepening:9 is nine seconds a move
+def parse_engine(spec):
+    kind, _, depth = spec.partition('@')
+    if kind not in KINDS or not depth.isdigit():
+        raise ValueError('engine must look like minimax@DEPTH, minimax2@DEPTH, deepening@DEPTH or pvs@DEPTH, '
+                         'got %r' % spec)
+    return kind, int(depth)
+
+
+def engine_name(engine):
+    return '%s@%d' % engine
+
+
+def tree_nodes(position, color, depth):  # positions algorithm.minimax visits, it prunes nothing and counts nothing
+    if depth == 0 or position.winner() is not None:
+        return 1
+    other = WHITE if color == RED else RED
+    return 1 + sum(tree_nodes(position.move(move), other, depth - 1) for move in position.get_all_moves(color))
+
+
+def search(engine, position, color):  # nodes searched by one run of engine, with a fresh table
+    kind, depth = engine
+    max_player = color == WHITE
+    if kind == 'minimax':
+        algorithm.minimax(position, depth, max_player, None)
+        return None
+    table = TranspositionTable(TABLE_SIZE_MB)
+    budget = Budget()  # no limit, only counts the nodes
+    if kind == 'minimax2':
+        algorithm2.minimax(position, depth, float('-inf'), float('inf'), max_player, None, table, budget=budget)
+    else:
+        iterative_deepening(position, max_player, None, None, max_depth=depth, table=table, budget=budget,
+                            pvs=kind == 'pvs')
+    return budget.nodes
+
+
+# {'seconds', 'nodes', 'nps', 'peak_kb'} for one position, peak_kb is None without memory (tracing is slow)
+def measure(engine, position, color, repeats=REPEATS, memory=True):
+    seconds = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        nodes = search(engine, position, color)
+        seconds = min(seconds, time.perf_counter() - start)
+    if nodes is None:
+        nodes = tree_nodes(position, color, engine[1])
+    if not memory:
+        return {'seconds': seconds, 'nodes': nodes, 'nps': nodes / max(seconds, 1e-9), 'peak_kb': None}
+    tracemalloc.start()  # on a run of its own, tracing slows everything it measures
+    try:
+        search(engine, position, color)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'nodes': nodes, 'nps': nodes / max(seconds, 1e-9), 'peak_kb': peak // 1024}
+
+
+# results of every engine on the suite, as written to the output file. report(engine, name, result) is called after
+# every position
+def run(engines, repeats=REPEATS, report=None, memory=True):
+    results = {}
+    for engine in engines:
+        positions = {}
+        for name, fen in SUITE:
+            position, color = parse_fen(fen)
+            positions[name] = measure(engine, position, color, repeats, memory)
+            if report is not None:
+                report(engine, name, positions[name])
+        seconds = sum(result['seconds'] for result in positions.values())
+        nodes = sum(result['nodes'] for result in positions.values())
+        total = {'seconds': seconds, 'nodes': nodes, 'nps': nodes / max(seconds, 1e-9),
+                 'peak_kb': max(result['peak_kb'] for result in positions.values()) if memory else None}
+        results[engine_name(engine)] = {'total': total, 'positions': positions}
+    return {'suite': SUITE_VERSION, 'python': platform.python_version(), 'machine': platform.machine(),
+            'repeats': repeats, 'engines': results}
+
+
+# what got worse than the baseline by more than threshold (a fraction), as lines for the user, empty if nothing did.
+# engines (and metrics) missing from either side are skipped. raises ValueError for a baseline of another suite version
+def compare(results, baseline, threshold=THRESHOLD):
+    if baseline['suite'] != results['suite']:
+        raise ValueError('baseline is suite version %d, this is version %d' % (baseline['suite'], results['suite']))
+    regressions = []
+    for engine, result in results['engines'].items():
+        if engine not in baseline['engines']:
+            continue
+        old, new = baseline['engines'][engine]['total'], result['total']
+        for metric in ('seconds', 'nodes', 'peak_kb'):  # all lower is better
+            if new[metric] is not None and old[metric] is not None and new[metric] > old[metric] * (1 + threshold):
+                regressions.append('%s %s: %s -> %s (%+.0f%%)' % (engine, metric, _format(old[metric]),
+                                                                 _format(new[metric]),
+                                                                 100 * (new[metric] / old[metric] - 1)))
+    return regressions
+
+
+def _format(value):
+    return '%.3f' % value if isinstance(value, float) else str(value)
+
+
+def _print_result(engine, name, result):
+    print('%-12s %-14s %8.3f s %10d nodes %9.0f nodes/s %7s KB' % (engine_name(engine), name, result['seconds'],
+                                                                 result['nodes'], result['nps'], result['peak_kb']))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='benchmark the engines on a fixed set of positions')
+    parser.add_argument('engines', nargs='*', type=parse_engine, default=[parse_engine(spec) for spec in ENGINES],
+                        help='minimax@DEPTH, minimax2@DEPTH, deepening@DEPTH or pvs@DEPTH, default %s'
+                        % ' '.join(ENGINES))
+    parser.add_argument('--out', default='bench.json', help='where the results are written')
+    parser.add_argument('--baseline', default=None, help='results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed slowdown, 0.1 is 10%%')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='runs per position, the fastest counts')
+    parser.add_argument('--no-memory', action='store_true', help='skip the (slow) peak memory runs')
+    options = parser.parse_args(args)
+
+    results = run(options.engines, options.repeats, _print_result, not options.no_memory)
+    for engine, result in results['engines'].items():
+        total = result['total']
+        print('%-12s total %8.3f s %10d nodes %9.0f nodes/s %7s KB peak' % (engine, total['seconds'], total['nodes'],
+                                                                          total['nps'], total['peak_kb']))
+    with open(options.out, 'w') as f:
+        json.dump(results, f, indent=1)
+    if options.baseline is None:
+        return 0
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, options.threshold)
+    for line in regressions:
+        print('REGRESSION', line, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
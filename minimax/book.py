@@ -0,0 +1,118 @@
+import argparse
+import mmap
+import random
+import struct
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from minimax.algorithm2 import search
+from minimax.transposition import TranspositionTable, position_key
+
+# opening book: searched scores for the moves of the first few plies, so the ai does not search the same
+# positions at the start of every game. the file is a header and fixed size entries sorted by the zobrist key of
+# the position (with side to move), one entry per book move, so a lookup is a binary search over the mmap
+MAGIC = b'CKOB'
+VERSION = 1
+HEADER = struct.Struct('<4sBI')  # magic, version, number of entries
+ENTRY = struct.Struct('<QBBIh')  # position key, move start, move end, captured mask, score for the side to move
+
+
+# search every position reachable in plies plies from the start, following the best moves (up to width of
+# them) of both sides, and score each of their moves with a full window search of depth depth.
+# returns a sorted list of (key, start, end, captured, score)
+def build(plies=6, depth=6, width=3, table_size_mb=64):
+    table = TranspositionTable(table_size_mb)
+    entries = []
+    seen = set()
+    frontier = [(BitBoard(), False)]  # red moves first, as in checkers.game
+    for _ in range(plies):
+        next_frontier = []
+        for position, max_player in frontier:
+            key = position_key(position, max_player)
+            if key in seen:
+                continue
+            seen.add(key)
+            table.new_search()
+            scored = []
+            for move in position.get_all_moves(WHITE if max_player else RED):
+                child = position.move(move)
+                score = search(child, depth - 1, float('-inf'), float('inf'), not max_player, None, table)
+                scored.append((score if max_player else -score, move, child))
+            scored.sort(key=lambda entry: entry[0], reverse=True)  # best for the side to move first
+            for score, (start, end, captured), child in scored[:width]:
+                entries.append((key, start, end, captured, score))
+                next_frontier.append((child, not max_player))
+        frontier = next_frontier
+    entries.sort()
+    return entries
+
+
+def write(path, entries):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+
+
+class Book:  # a book file opened with mmap, so every process that opens it shares the same pages
+    def __init__(self, path, variety=0, seed=None):  # variety = how much worse than the best a picked move may score
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a version %d opening book' % (path, VERSION))
+        self.variety = variety
+        self.random = random.Random(seed)
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def _key(self, i):
+        return ENTRY.unpack_from(self.data, HEADER.size + i * ENTRY.size)[0]
+
+    def moves(self, position, max_player):  # [(score, (start, end, captured))] stored for a bitboard, best first
+        key = position_key(position, max_player)
+        low, high = 0, self.count
+        while low < high:  # first entry with this key
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        while low < self.count:
+            entry_key, start, end, captured, score = ENTRY.unpack_from(self.data, HEADER.size + low * ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((score, (start, end, captured)))
+            low += 1
+        moves.sort(key=lambda move: move[0], reverse=True)
+        return moves
+
+    def choose(self, position, max_player):  # the position after a book move, or None if the book does not know it
+        bitboard = position if isinstance(position, BitBoard) else BitBoard.from_board(position)
+        legal = bitboard.get_all_moves(WHITE if max_player else RED)
+        moves = [(score, move) for score, move in self.moves(bitboard, max_player) if move in legal]  # guards against hash collisions
+        if not moves:
+            return None
+        best = moves[0][0]
+        move = self.random.choice([move for score, move in moves if score >= best - self.variety])
+        new_position = bitboard.move(move)
+        return new_position if isinstance(position, BitBoard) else new_position.to_board()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='build an opening book by searching the first plies deeply')
+    parser.add_argument('--plies', type=int, default=6, help='how many plies from the start the book covers')
+    parser.add_argument('--depth', type=int, default=6, help='search depth used to score each move')
+    parser.add_argument('--width', type=int, default=3, help='best moves per position followed further')
+    parser.add_argument('--out', default='opening.book', help='file to write')
+    options = parser.parse_args(args)
+    write(options.out, build(options.plies, options.depth, options.width))
+
+
+if __name__ == '__main__':
+    main()
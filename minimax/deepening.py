@@ -0,0 +1,95 @@
+import time
+
+from minimax.algorithm2 import INFINITY, MATE_BOUND, minimax, pvs
+from minimax.ordering import MoveOrdering
+from minimax.transposition import TranspositionTable
+
+
+ASPIRATION = 50  # half width of the pvs window around the last iteration's value, half a man
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Budget:  # wall clock and/or node limit for one search, the search calls tick() once per node
+    CHECK_EVERY = 64  # nodes between clock checks
+
+    def __init__(self, time_limit=None, max_nodes=None):
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def tick(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout()
+        if self.deadline is not None and self.nodes % self.CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def stop(self):  # end the search at its next clock check, safe to call from another thread
+        self.deadline = 0
+
+    def extend(self, time_limit):  # let the search run time_limit more seconds from now
+        self.deadline = time.perf_counter() + time_limit
+
+
+# search depth 1, 2, 3... with algorithm2.minimax until the time or node budget runs out and return the result of the
+# deepest search that finished as (value, new board, depth). each iteration leaves its best moves in the table and
+# the killer/history tables, so the next one tries them first and prunes much more. pass a budget instead of
+# time_limit/max_nodes to read how many nodes were searched afterwards. with a tablebase that knows the position
+# one iteration is enough, every child already gets its exact score. batch_plies is passed on to algorithm2.minimax,
+# on_iteration(depth, value, new board) is called after every iteration that finishes, stats (a stats.SearchStats)
+# collects counters over all iterations. with pvs=True every iteration runs algorithm2.pvs instead of minimax, with
+# a window of ASPIRATION around the value of the iteration before, widened to the side it fails on
+def iterative_deepening(position, max_player, observer=None, time_limit=1.0, max_nodes=None, max_depth=64, table=None,
+                        budget=None, tablebase=None, batch_plies=0, on_iteration=None, stats=None, pvs=False):
+    if table is None:
+        table = TranspositionTable()
+    table.new_search()
+    order = MoveOrdering()
+    if budget is None:
+        budget = Budget(time_limit, max_nodes)
+    if stats is not None:
+        stats.attach(table, tablebase)
+    result = position.evaluate(), position
+    depth = 0
+    for next_depth in range(1, max_depth + 1):
+        order.new_iteration()
+        try:
+            # depth 1 always finishes so there is a move to return however small the budget is
+            args = (max_player, observer, table, order, budget if next_depth > 1 else None, tablebase, batch_plies, stats)
+            if pvs:
+                result = _aspiration(position, next_depth, result[0] if depth else None, args, stats)
+            else:
+                result = minimax(position, next_depth, float('-inf'), float('inf'), *args)
+        except SearchTimeout:
+            break
+        depth = next_depth
+        if stats is not None:
+            stats.iteration(depth, result[0])
+        if on_iteration is not None:
+            on_iteration(depth, result[0], result[1])
+        if position.winner() is not None:
+            break
+        if tablebase is not None and tablebase.probe(position, max_player) is not None:
+            break
+
+    return result[0], result[1], depth
+
+
+# algorithm2.pvs in a narrow window around guess, widened until it fits. stats counts the windows that failed
+def _aspiration(position, depth, guess, args, stats=None):
+    if guess is None or abs(guess) > MATE_BOUND:
+        return pvs(position, depth, -INFINITY, INFINITY, *args)
+    alpha, beta = guess - ASPIRATION, guess + ASPIRATION
+    while True:
+        result = pvs(position, depth, alpha, beta, *args)
+        if alpha < result[0] < beta:
+            return result
+        if stats is not None:
+            stats.aspiration_failures += 1
+        if result[0] <= alpha:
+            alpha = -INFINITY
+        else:
+            beta = INFINITY
@@ -0,0 +1,174 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+
+EXPLORATION = 1.4  # uct exploration constant, higher tries more moves, lower digs deeper into the best ones
+PLAYOUT_PLIES = 80  # a playout that gets this long is stopped and scored with evaluate()
+DRAW_MARGIN = 100  # a stopped playout closer to even than this (a man) counts as a draw
+BATCH = 16  # playouts a worker process runs from the same leaf per job, so one job is worth sending
+
+
+def playout(position, white_to_move, rng, plies=PLAYOUT_PLIES):  # random game from a position, 1, 0.5 or 0 for white
+    for _ in range(plies):
+        winner = position.winner()
+        if winner is not None:
+            return 1.0 if winner == WHITE else 0.0
+        moves = position.get_all_moves(WHITE if white_to_move else RED)
+        if not moves:  # no moves loses
+            return 0.0 if white_to_move else 1.0
+        position = position.move(rng.choice(moves))
+        white_to_move = not white_to_move
+    score = position.evaluate()
+    return 1.0 if score > DRAW_MARGIN else 0.0 if score < -DRAW_MARGIN else 0.5
+
+
+def _playouts(job):  # the summed result of count playouts, in a worker of the search's pool
+    white, red, kings, white_to_move, count, plies, seed = job
+    position = BitBoard(white, red, kings)
+    rng = random.Random(seed)
+    return sum(playout(position, white_to_move, rng, plies) for _ in range(count))
+
+
+class Node:
+    __slots__ = ('position', 'white_to_move', 'parent', 'children', 'untried', 'visits', 'score')
+
+    def __init__(self, position, white_to_move, parent=None):
+        self.position = position
+        self.white_to_move = white_to_move
+        self.parent = parent
+        self.children = []
+        self.untried = None  # moves not expanded yet, listed on the first visit
+        self.visits = 0
+        self.score = 0.0  # sum of the results for white of every playout through this node
+
+    def result(self):  # 1 or 0 for white if the game is over here, else None
+        winner = self.position.winner()
+        if winner is not None:
+            return 1.0 if winner == WHITE else 0.0
+        if self.untried is None:
+            self.untried = self.position.get_all_moves(WHITE if self.white_to_move else RED)
+        if not self.untried and not self.children:  # no moves loses
+            return 0.0 if self.white_to_move else 1.0
+        return None
+
+    def uct(self, child, exploration):  # value of a child for the side to move here, plus the exploration bonus
+        mean = child.score / child.visits
+        if not self.white_to_move:
+            mean = 1 - mean
+        return mean + exploration * math.sqrt(math.log(self.visits) / child.visits)
+
+
+# monte carlo tree search with uct. every playout walks down the tree picking the child with the best uct value,
+# adds one new node, plays a random game from it and counts the result in every node on the way back up. the tree is
+# kept between moves: the next search starts from the node of the position the opponent's reply led to, with all
+# the playouts already spent below it. with workers > 1 the playouts run in worker processes, a few leaves at a time,
+# each chosen with a virtual loss on its path so the others go elsewhere. stop after time_limit seconds or
+# max_playouts playouts, whichever comes first (either may be None). call close() to shut the workers down
+class MCTS:
+    def __init__(self, time_limit=1.0, max_playouts=None, exploration=EXPLORATION, workers=None, plies=PLAYOUT_PLIES,
+                 seed=None):
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.workers = workers
+        self.plies = plies
+        self.rng = random.Random(seed)
+        self.root = None
+        self.playouts = 0  # playouts the last search ran
+        self.reused = 0  # playouts below the last search's root it found in the kept tree
+        self.executor = None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _reroot(self, position, white_to_move):  # the node for this position in the kept tree (two plies deep at most)
+        candidates = [self.root] if self.root is not None else []
+        for node in list(candidates):
+            candidates += node.children
+            for child in node.children:
+                candidates += child.children
+        for node in candidates:
+            if node.white_to_move == white_to_move and node.position == position:
+                node.parent = None  # let the rest of the old tree go
+                return node
+        return Node(position, white_to_move)
+
+    def search(self, position, max_player):  # returns (expected result for max_player, new position) like minimax
+        bitboard = position if isinstance(position, BitBoard) else BitBoard.from_board(position)
+        self.root = self._reroot(bitboard, bool(max_player))
+        if self.root.result() is not None:
+            return (1.0 if self.root.result() == float(bool(max_player)) else 0.0), position
+
+        parallel = self.workers is not None and self.workers > 1
+        if parallel and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.reused = self.root.visits
+        while True:  # at least one playout, so there is a move to return
+            if parallel:
+                self._parallel_round()
+            else:
+                path = self._select()
+                leaf = path[-1]
+                result = leaf.result()
+                if result is None:
+                    result = playout(leaf.position, leaf.white_to_move, self.rng, self.plies)
+                self._backup(path, 1, result)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            if self.max_playouts is not None and self.root.visits - self.reused >= self.max_playouts:
+                break
+        self.playouts = self.root.visits - self.reused
+
+        best = max(self.root.children, key=lambda child: child.visits)
+        value = best.score / best.visits
+        best_move = best.position
+        return value if max_player else 1 - value, best_move if isinstance(position, BitBoard) else best_move.to_board()
+
+    def _select(self):  # path from the root to a new leaf (or to a finished game)
+        node = self.root
+        path = [node]
+        while node.result() is None and not node.untried:
+            node = max(node.children, key=lambda child: node.uct(child, self.exploration))
+            path.append(node)
+        if node.result() is None:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            child = Node(node.position.move(move), not node.white_to_move, node)
+            node.children.append(child)
+            path.append(child)
+        return path
+
+    def _backup(self, path, visits, score):
+        for node in path:
+            node.visits += visits
+            node.score += score
+
+    def _virtual_loss(self, path, sign):  # count BATCH lost playouts for whoever chose each node, or take them back
+        for parent, node in zip(path, path[1:]):
+            node.visits += sign * BATCH
+            if not parent.white_to_move:  # red chose it, a red loss is a white win
+                node.score += sign * BATCH
+        path[0].visits += sign * BATCH
+
+    def _parallel_round(self):  # one leaf per worker, BATCH playouts each
+        paths, jobs = [], []
+        for _ in range(self.workers):
+            path = self._select()
+            leaf = path[-1]
+            result = leaf.result()
+            if result is not None:  # nothing to play out
+                self._backup(path, BATCH, BATCH * result)
+                continue
+            self._virtual_loss(path, 1)
+            paths.append(path)
+            jobs.append((leaf.position.white, leaf.position.red, leaf.position.kings, leaf.white_to_move, BATCH,
+                         self.plies, self.rng.getrandbits(32)))
+        for path, score in zip(paths, self.executor.map(_playouts, jobs)):
+            self._virtual_loss(path, -1)
+            self._backup(path, BATCH, score)
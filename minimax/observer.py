@@ -0,0 +1,81 @@
+import time
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import ROW_COL, BitBoard
+from minimax.transposition import position_key
+
+FPS = 30  # frames a second the ui is shown the search at
+SAMPLE = 64  # moves between clock checks, so most moves cost the search a counter and nothing else
+LINE_PLIES = 6  # moves of the best line followed through the table
+
+
+# what a search (algorithm2, deepening) tells the observer it is given, as plain data and never by drawing: consider
+# before every move it searches, with the keys of all the moves of that node, and best whenever the best move at the
+# root changes. keys are (start, end, captured) on a BitBoard and ((row, col), (row, col)) on a Board. searches are
+# given None unless something watches, which costs them one comparison per move
+class SearchObserver:
+    def consider(self, key, keys):
+        pass
+
+    def best(self, key, value):
+        pass
+
+
+def squares(key):  # (from, to) as (row, col) for a move key of either board
+    if isinstance(key[0], tuple):
+        return key[0], key[1]
+    return ROW_COL[key[0]], ROW_COL[key[1]]
+
+
+# an observer for a ui that draws while the search runs in another thread. every SAMPLE moves it looks at the clock,
+# and once a frame (1 / fps seconds) has passed it keeps the piece being considered and the squares that piece can
+# go to. the ui calls snapshot() when it draws, it never makes the search wait. with the position searched from and
+# the search's table the best line goes on past the root move, the way the table expects the game to continue
+class ThrottledObserver(SearchObserver):
+    def __init__(self, fps=FPS, position=None, max_player=True, table=None, line_plies=LINE_PLIES):
+        self.interval = 1 / fps
+        self.position = position
+        self.max_player = max_player
+        self.table = table
+        self.line_plies = line_plies
+        self.countdown = SAMPLE
+        self.last = 0.0
+        self.frames = 0  # samples kept
+        self.piece = None
+        self.candidates = ()
+        self.best_key = None
+        self.value = None
+
+    def consider(self, key, keys):
+        self.countdown -= 1
+        if self.countdown:
+            return
+        self.countdown = SAMPLE
+        now = time.perf_counter()
+        if now - self.last < self.interval:
+            return
+        self.last = now
+        self.frames += 1
+        self.piece, self.candidates = squares(key)[0], tuple(squares(other)[1] for other in keys if other[0] == key[0])
+
+    def best(self, key, value):  # rare, kept every time
+        self.best_key, self.value = key, value
+
+    def line(self):  # the best root move and the replies the table expects, as (from, to) squares
+        key = self.best_key
+        if key is None:
+            return []
+        line = [squares(key)]
+        if self.table is None or not isinstance(self.position, BitBoard):
+            return line
+        position, max_player = self.position.move(key), not self.max_player
+        for _ in range(self.line_plies - 1):
+            entry = self.table.peek(position_key(position, max_player))  # the search may be writing it right now
+            if entry is None or entry[3] not in position.get_all_moves(WHITE if max_player else RED):
+                break
+            line.append(squares(entry[3]))
+            position, max_player = position.move(entry[3]), not max_player
+        return line
+
+    def snapshot(self):  # {'piece', 'candidates', 'line', 'value'} as last sampled
+        return {'piece': self.piece, 'candidates': self.candidates, 'line': self.line(), 'value': self.value}
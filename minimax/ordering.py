@@ -0,0 +1,23 @@
+class MoveOrdering:  # decides which moves the search tries first, the sooner a good move is tried the more alpha-beta prunes
+    KILLERS = 2  # quiet moves remembered per depth
+
+    def __init__(self):
+        self.killers = {}  # depth -> quiet moves that caused a cutoff at that depth in this iteration
+        self.history = {}  # move -> how often (weighted by depth) it caused a cutoff anywhere
+
+    def new_iteration(self):  # killers only make sense within one iteration, history is kept but aged
+        self.killers = {}
+        self.history = {move: score // 2 for move, score in self.history.items() if score > 1}
+
+    def score(self, move, captures, depth, first=None):  # sort key, higher is tried earlier
+        # principal variation / table move first, then captures by pieces taken, then killers, then history
+        return move == first, captures, move in self.killers.get(depth, ()), self.history.get(move, 0)
+
+    def cutoff(self, move, captures, depth):  # record a move that caused a beta cutoff
+        if captures:  # captures are already ordered first
+            return
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.KILLERS:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
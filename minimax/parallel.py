@@ -0,0 +1,43 @@
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from minimax.algorithm2 import search
+from minimax.workers import make_pool, worker_table
+
+WORKER_TABLE_MB = 8  # transposition table each worker process uses for the root moves it searches
+
+
+def _search_root_move(job):  # exact score of one root move, in a worker of make_executor
+    white, red, kings, depth, max_player = job
+    position = BitBoard(white, red, kings)
+    table = worker_table()
+    if table is not None:
+        table.clear()  # entries of deeper earlier searches would give scores the serial search does not find
+    return search(position, depth, float('-inf'), float('inf'), max_player, None, table)
+
+
+# split the root moves over a process pool and search each one with a full window, so every score is exact and the
+# best one is the same value the serial algorithm2.minimax finds at this depth. ties go to the first move in
+# BitBoard.get_all_moves order, like the serial search on a bitboard. positions are sent as (white, red, kings) ints,
+# never as Board/Piece objects. pass an executor made with make_executor to reuse the workers between moves,
+# otherwise a pool with workers processes (default: one per core) is made for this search only
+def parallel_minimax(position, depth, max_player, workers=None, executor=None):
+    bitboard = position if isinstance(position, BitBoard) else BitBoard.from_board(position)
+    moves = bitboard.get_all_moves(WHITE if max_player else RED)
+    if depth == 0 or bitboard.winner() is not None or not moves:
+        return position.evaluate(), position
+
+    children = [bitboard.move(move) for move in moves]
+    jobs = [(child.white, child.red, child.kings, depth - 1, not max_player) for child in children]
+    if executor is None:
+        with make_executor(workers) as pool:
+            scores = list(pool.map(_search_root_move, jobs))
+    else:
+        scores = list(executor.map(_search_root_move, jobs))
+
+    best = max(scores) if max_player else min(scores)
+    best_move = children[scores.index(best)]
+    return best, best_move if isinstance(position, BitBoard) else best_move.to_board()
+
+
+def make_executor(workers=None):  # process pool whose workers each have a transposition table, emptied for every job
+    return make_pool(workers, WORKER_TABLE_MB)
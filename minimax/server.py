@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from checkers.records import GameRecord, move_text, parse_fen, parse_move, to_fen
+from minimax.mcts import MCTS
+from minimax.tournament import MAX_PLIES, TIMED, choose_move, parse_engine
+from minimax.workers import make_pool, worker_table
+
+# headless game server: many games at once over a local socket, one json object per line each way. every ai move is
+# sent to one shared process pool, so the number of games is limited by memory and not by processes. requests:
+#   {"cmd": "new", "ai": "white", "engine": "deepening:0.5", "fen": "B:W21-32:B1-12"}  ai: red, white, both or none
+#   {"cmd": "move", "session": 1, "move": "11-15"}  moves in PDN numbering, see checkers.records
+#   {"cmd": "state", "session": 1}, {"cmd": "pdn", "session": 1}, {"cmd": "close", "session": 1}
+# every request gets one reply (with the request's "id" if it had one), a session's state or {"error": ...}. ai moves
+# arrive on their own as {"event": "move", ...state} once the engine is done, or {"event": "error", ...} if the
+# server is too busy to take them
+HOST = '127.0.0.1'
+PORT = 8765
+DEFAULT_ENGINE = 'deepening:0.5'
+MAX_THINK = 5.0  # longest time a client may give an engine per move
+MAX_DEPTH = 8  # deepest fixed depth a client may ask for
+MAX_QUEUED = 256  # ai moves waiting for a worker before more are refused
+MAX_SESSIONS = 1000
+WORKER_TABLE_MB = 16
+
+
+def _think(job):  # the move an engine plays, in a worker of the server's pool
+    white, red, kings, color, engine = job
+    position = BitBoard(white, red, kings)
+    state = MCTS(engine[1]) if engine[0] == 'mcts' else worker_table()
+    new_position = choose_move(engine, position, color, state)[0]
+    return next(move for move in position.get_all_moves(color) if position.move(move) == new_position)
+
+
+def client_engine(spec):  # parse an engine a client asked for, within the server's limits
+    kind, arg = parse_engine(spec)
+    if kind in TIMED and not arg > 0 or kind not in TIMED and arg < 1:  # not arg > 0 also refuses nan
+        raise ValueError('engine needs a depth of at least 1 or more than 0 seconds, got %r' % spec)
+    return kind, min(arg, MAX_THINK) if kind in TIMED else min(arg, MAX_DEPTH)
+
+
+class Busy(Exception):
+    pass
+
+
+class Session:  # one game: its record, the side to move, which sides the server plays and the engine it plays with
+    def __init__(self, id, record, ai, engine):
+        self.id = id
+        self.record = record
+        self.position, self.turn = record.start, record.turn
+        self.ai = ai
+        self.engine = engine
+        self.task = None  # the ai's turns in progress
+
+    def moves(self):
+        return self.position.get_all_moves(self.turn)
+
+    def winner(self):  # RED, WHITE, 'draw' or None
+        if self.position.winner() is not None:
+            return self.position.winner()
+        if not self.moves():  # no moves loses
+            return WHITE if self.turn == RED else RED
+        if len(self.record.moves) >= MAX_PLIES:
+            return 'draw'
+        return None
+
+    def play(self, move):
+        self.record.moves.append(move)
+        self.position = self.position.move(move)
+        self.turn = WHITE if self.turn == RED else RED
+        winner = self.winner()
+        if winner is not None:
+            self.record.result = 0.5 if winner == 'draw' else 1 if winner == RED else 0
+
+    def ai_to_move(self):
+        return self.turn in self.ai and self.winner() is None
+
+    def state(self):
+        winner = self.winner()
+        moves = self.moves() if winner is None else []
+        return {'session': self.id, 'fen': to_fen(self.position, self.turn), 'turn': _name(self.turn),
+                'moves': [move_text(move, moves) for move in moves],
+                'played': len(self.record.moves), 'winner': winner if winner in (None, 'draw') else _name(winner)}
+
+
+def _name(color):
+    return 'red' if color == RED else 'white'
+
+
+AI = {'none': (), 'red': (RED,), 'white': (WHITE,), 'both': (RED, WHITE)}
+
+
+# the server: sessions by id, the engine pool, and a semaphore with one slot per worker so ai moves queue here
+# (where a disconnect can still cancel them) instead of inside the pool
+class Server:
+    def __init__(self, workers=None, max_queued=MAX_QUEUED, max_sessions=MAX_SESSIONS):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = make_pool(self.workers, WORKER_TABLE_MB)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.max_queued = max_queued
+        self.max_sessions = max_sessions
+        self.queued = 0  # ai moves waiting for or running on a worker
+        self.sessions = {}
+        self.ids = itertools.count(1)
+
+    def close(self):
+        for session in self.sessions.values():
+            if session.task is not None:
+                session.task.cancel()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):  # one client connection, its sessions end when it disconnects
+        lock = asyncio.Lock()
+        own = set()
+
+        async def send(message):
+            async with lock:  # one line at a time, and wait while the client is slow to read (backpressure)
+                writer.write(json.dumps(message).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = self.command(request, own, send)
+                except (ValueError, KeyError, TypeError) as error:
+                    reply = {'error': str(error)}
+                if isinstance(request, dict) and 'id' in request:
+                    reply['id'] = request['id']
+                await send(reply)
+        except ConnectionError:
+            pass
+        finally:
+            for id in own:
+                session = self.sessions.pop(id, None)
+                if session is not None and session.task is not None:
+                    session.task.cancel()  # a move still waiting for a worker is dropped, a running one finishes
+            writer.close()
+
+    def command(self, request, own, send):
+        cmd = request['cmd']
+        if cmd == 'new':
+            if len(self.sessions) >= self.max_sessions:
+                raise ValueError('too many sessions')
+            start, turn = parse_fen(request['fen']) if 'fen' in request else (None, RED)
+            session = Session(next(self.ids), GameRecord(start, turn), AI[request.get('ai', 'white')],
+                              client_engine(request.get('engine', DEFAULT_ENGINE)))
+            self.sessions[session.id] = session
+            own.add(session.id)
+            self._start_ai(session, send)
+            return session.state()
+
+        id = request['session']
+        if id not in own:
+            raise ValueError('no session %r' % id)
+        session = self.sessions[id]
+        if cmd == 'move':
+            if session.turn in session.ai or session.winner() is not None:
+                raise ValueError('not your move')
+            session.play(parse_move(session.position, session.turn, request['move']))
+            self._start_ai(session, send)
+            return session.state()
+        if cmd == 'state':
+            self._start_ai(session, send)  # picks the ai's turn up again after it was refused as busy
+            return session.state()
+        if cmd == 'pdn':
+            return {'session': id, 'pdn': session.record.to_pdn()}
+        if cmd == 'close':
+            own.discard(id)
+            del self.sessions[id]
+            if session.task is not None:
+                session.task.cancel()
+            return {'session': id, 'closed': True}
+        raise ValueError('unknown command %r' % cmd)
+
+    def _start_ai(self, session, send):
+        if session.ai_to_move() and (session.task is None or session.task.done()):
+            session.task = asyncio.create_task(self._ai_turns(session, send))
+
+    async def _ai_turns(self, session, send):  # play the server's moves until it is the client's turn or the game ends
+        try:
+            while session.ai_to_move():
+                move = await self.think(session)
+                text = move_text(move, session.moves())
+                session.play(move)
+                await send(dict(session.state(), event='move', move=text))
+        except ConnectionError:
+            pass
+        except Exception as error:  # busy, or a job that broke: tell the client instead of dropping the session's turn
+            message = 'server busy, send state to retry' if isinstance(error, Busy) else 'engine failed: %r' % error
+            try:
+                await send({'event': 'error', 'session': session.id, 'error': message})
+            except ConnectionError:
+                pass
+
+    async def think(self, session):  # the engine's move for the session, computed on the pool
+        if self.queued >= self.max_queued:
+            raise Busy()
+        self.queued += 1
+        try:
+            async with self.slots:
+                job = session.position.white, session.position.red, session.position.kings, session.turn, session.engine
+                return await asyncio.get_running_loop().run_in_executor(self.executor, _think, job)
+        finally:
+            self.queued -= 1
+
+
+async def serve(host=HOST, port=PORT, workers=None, max_queued=MAX_QUEUED, started=None):
+    server = Server(workers, max_queued)
+    listener = await asyncio.start_server(server.handle, host, port)
+    if started is not None:  # called with the listening socket's (host, port), for tests that listen on port 0
+        started(listener.sockets[0].getsockname()[:2])
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='serve many checkers games over line based json on a local socket')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None, help='engine processes, default one per core')
+    parser.add_argument('--max-queued', type=int, default=MAX_QUEUED, help='ai moves that may wait for a worker')
+    options = parser.parse_args(args)
+    asyncio.run(serve(options.host, options.port, options.workers, options.max_queued,
+                      lambda address: print('listening on %s:%d' % address)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import json
+import time
+
+
+# counters algorithm2 fills in when it is given a SearchStats as stats. every hook is behind an `if stats is not None`,
+# so a search without one pays nothing. iterative_deepening calls iteration() after each depth, which records it and
+# passes report() to the observer
+class SearchStats:
+    def __init__(self, observer=None, trace=False):
+        self.observer = observer  # called with report() after every finished iteration
+        self.nodes = {}  # remaining depth -> nodes visited there
+        self.leaves = 0  # positions scored with evaluate()
+        self.cutoffs = 0  # beta cutoffs
+        self.first_cutoffs = 0  # beta cutoffs by the first move tried, the better the ordering the closer to cutoffs
+        self.researches = 0  # pvs null window searches that failed high and were searched again
+        self.aspiration_failures = 0  # iterations whose value fell outside the aspiration window
+        self.generation_time = 0.0  # seconds spent listing and ordering moves
+        self.copy_time = 0.0  # making child positions (BitBoard.move, Board.make_move/unmake_move, copies)
+        self.evaluation_time = 0.0
+        self.iterations = []  # (depth, nodes, seconds, value) of every finished iteration
+        self.events = [] if trace else None  # chrome trace events, see write_trace
+        self.started = self.last = time.perf_counter()
+        self.table = self.tablebase = None
+        self.table_start = self.tablebase_start = None
+
+    def attach(self, table=None, tablebase=None):  # report the hit rates of these from now on
+        self.table, self.tablebase = table, tablebase
+        if table is not None:
+            self.table_start = table.hits, table.probes
+        if tablebase is not None:
+            self.tablebase_start = tablebase.hits
+
+    def node(self, depth):
+        self.nodes[depth] = self.nodes.get(depth, 0) + 1
+
+    def evaluate(self, position):  # position.evaluate(), counted and timed
+        start = time.perf_counter()
+        score = position.evaluate()
+        self.evaluation_time += time.perf_counter() - start
+        self.leaves += 1
+        return score
+
+    def cutoff(self, index):  # index = how many moves were tried before the one that cut off
+        self.cutoffs += 1
+        if index == 0:
+            self.first_cutoffs += 1
+
+    def research(self):
+        self.researches += 1
+
+    def total_nodes(self):
+        return sum(self.nodes.values())
+
+    def iteration(self, depth, value):
+        now = time.perf_counter()
+        nodes = self.total_nodes() - sum(entry[1] for entry in self.iterations)
+        self.iterations.append((depth, nodes, now - self.last, value))
+        if self.events is not None:
+            self.events.append({'name': 'depth %d' % depth, 'ph': 'X', 'pid': 0, 'tid': 0,
+                                'ts': (self.last - self.started) * 1e6, 'dur': (now - self.last) * 1e6,
+                                'args': {'nodes': nodes, 'value': value}})
+        self.last = now
+        if self.observer is not None:
+            self.observer(self.report())
+
+    def branching_factor(self):  # nodes of the last iteration over nodes of the one before
+        if len(self.iterations) < 2 or not self.iterations[-2][1]:
+            return None
+        return self.iterations[-1][1] / self.iterations[-2][1]
+
+    def report(self):
+        seconds = time.perf_counter() - self.started
+        nodes = self.total_nodes()
+        report = {
+            'nodes': nodes,
+            'nodes_per_depth': dict(sorted(self.nodes.items(), reverse=True)),
+            'leaves': self.leaves,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': self.first_cutoffs / self.cutoffs if self.cutoffs else None,
+            'researches': self.researches,
+            'aspiration_failures': self.aspiration_failures,
+            'branching_factor': self.branching_factor(),
+            'seconds': seconds,
+            'nodes_per_second': nodes / seconds if seconds else None,
+            'generation_seconds': self.generation_time,
+            'copy_seconds': self.copy_time,
+            'evaluation_seconds': self.evaluation_time,
+            'iterations': [{'depth': depth, 'nodes': nodes, 'seconds': seconds, 'value': value}
+                           for depth, nodes, seconds, value in self.iterations],
+        }
+        if self.table is not None:
+            hits, probes = self.table.hits - self.table_start[0], self.table.probes - self.table_start[1]
+            report['table_hit_rate'] = hits / probes if probes else None
+        if self.tablebase is not None:
+            report['tablebase_hits'] = self.tablebase.hits - self.tablebase_start
+        return report
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=4, default=str)
+
+    def write_trace(self, path):  # one span per iteration, open it in chrome://tracing or perfetto
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events or []}, f, default=str)
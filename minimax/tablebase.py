@@ -0,0 +1,213 @@
+import argparse
+import itertools
+import mmap
+import struct
+from collections import deque
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard, SQUARES, RED_KING_ROW, WHITE_KING_ROW
+
+# endgame tablebase: for every position with up to a few pieces, how many plies until the game ends with best play.
+# an even distance means the side to move loses, an odd one that it wins, DRAW that nobody can force a win.
+# positions are grouped by material (white men, white kings, red men, red kings) and each group is one flat
+# array of bytes, indexed by ranking the squares of each kind of piece (see _index)
+MAGIC = b'CKTB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBH')  # magic, version, max pieces, number of material groups
+GROUP = struct.Struct('<4BQ')  # material, offset of its bytes in the file
+DRAW = 255
+MAX_DISTANCE = 254
+WIN_SCORE = 100000  # score of a won position, minus the plies it takes, far above anything evaluate() returns
+
+_BINOMIAL = [[1] + [0] * SQUARES for _ in range(SQUARES + 1)]
+for _n in range(1, SQUARES + 1):
+    for _k in range(1, SQUARES + 1):
+        _BINOMIAL[_n][_k] = _BINOMIAL[_n - 1][_k - 1] + _BINOMIAL[_n - 1][_k]
+
+
+def _rank(bits):  # index of a set of squares among all sets of the same size (combinatorial number system)
+    rank = i = 0
+    while bits:
+        low = bits & -bits
+        i += 1
+        rank += _BINOMIAL[low.bit_length() - 1][i]
+        bits ^= low
+    return rank
+
+
+def _split(position):  # the four kinds of piece of a bitboard as masks
+    kings = position.kings
+    return position.white & ~kings, position.white & kings, position.red & ~kings, position.red & kings
+
+
+def _material(masks):
+    return tuple(bits.bit_count() for bits in masks)
+
+
+def _group_size(material):  # one byte per placement of the pieces (overlapping ones included) and side to move
+    size = 2
+    for count in material:
+        size *= _BINOMIAL[SQUARES][count]
+    return size
+
+
+def _index(masks, white_to_move):
+    index = 0
+    for bits in masks:
+        index = index * _BINOMIAL[SQUARES][bits.bit_count()] + _rank(bits)
+    return index * 2 + (1 if white_to_move else 0)
+
+
+def _materials(pieces):  # every material with one to pieces pieces on the board and at least one per side
+    for material in itertools.product(range(pieces + 1), repeat=4):
+        if material[0] + material[1] and material[2] + material[3] and sum(material) <= pieces:
+            yield material
+
+
+def _positions(material):  # every legal placement of a material as a bitboard, men never stand on their king row
+    white_men, white_kings, red_men, red_kings = material
+    everywhere = range(SQUARES)
+    for wm in itertools.combinations([sq for sq in everywhere if not WHITE_KING_ROW >> sq & 1], white_men):
+        for wk in itertools.combinations(everywhere, white_kings):
+            for rm in itertools.combinations([sq for sq in everywhere if not RED_KING_ROW >> sq & 1], red_men):
+                for rk in itertools.combinations(everywhere, red_kings):
+                    squares = wm + wk + rm + rk
+                    if len(set(squares)) == len(squares):
+                        white = sum(1 << sq for sq in wm + wk)
+                        red = sum(1 << sq for sq in rm + rk)
+                        yield BitBoard(white, red, sum(1 << sq for sq in wk + rk))
+
+
+# retrograde analysis over every position with up to pieces pieces. each position is linked to the positions it can
+# be reached from, then the results spread backwards from the lost positions: a position with a lost child is won,
+# one whose children are all won is lost, processed in order of distance so every distance is the shortest win
+# (or longest loss). whatever is left is a draw. returns {material: bytearray}
+def generate(pieces=3):
+    groups = {material: bytearray([DRAW]) * _group_size(material) for material in _materials(pieces)}
+    offsets = {}
+    total = 0
+    for material in groups:
+        offsets[material] = total
+        total += len(groups[material])
+
+    def node(position, white_to_move):  # position -> one number across all groups
+        masks = _split(position)
+        return offsets[_material(masks)] + _index(masks, white_to_move)
+
+    parents = {}
+    remaining = {}
+    distance = {}
+    queue = deque()
+    wins = []  # positions that take the last enemy piece, won in one ply
+    for material in groups:
+        for position in _positions(material):
+            for white_to_move in (True, False):
+                here = node(position, white_to_move)
+                moves = position.get_all_moves(WHITE if white_to_move else RED)
+                if not moves:
+                    distance[here] = 0
+                    queue.append(here)
+                    continue
+                children = set()
+                for move in moves:
+                    child = position.move(move)
+                    if not (child.red if white_to_move else child.white):
+                        wins.append(here)
+                        break
+                    children.add(node(child, not white_to_move))
+                else:
+                    remaining[here] = len(children)
+                    for child in children:
+                        parents.setdefault(child, []).append(here)
+
+    for here in wins:  # after the lost positions so the queue stays in order of distance
+        distance[here] = 1
+        queue.append(here)
+
+    while queue:
+        here = queue.popleft()
+        plies = distance[here] + 1
+        for parent in parents.get(here, ()):
+            if parent in distance:
+                continue
+            if distance[here] % 2 == 0:  # a move into a lost position wins
+                distance[parent] = plies
+                queue.append(parent)
+            else:
+                remaining[parent] -= 1
+                if not remaining[parent]:  # every move leads to a won position for the other side
+                    distance[parent] = plies
+                    queue.append(parent)
+
+    starts = sorted((offset, material) for material, offset in offsets.items())
+    for here, plies in distance.items():
+        for offset, material in reversed(starts):
+            if here >= offset:
+                groups[material][here - offset] = min(plies, MAX_DISTANCE - plies % 2)
+                break
+    return groups
+
+
+def write(path, groups, pieces):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, pieces, len(groups)))
+        offset = HEADER.size + GROUP.size * len(groups)
+        for material, data in groups.items():
+            f.write(GROUP.pack(*material, offset))
+            offset += len(data)
+        for data in groups.values():
+            f.write(data)
+
+
+class Tablebase:  # a tablebase file opened with mmap, so every process that opens it shares the same pages
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.pieces, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a version %d tablebase' % (path, VERSION))
+        self.groups = {}  # material -> offset
+        for i in range(count):
+            *material, offset = GROUP.unpack_from(self.data, HEADER.size + i * GROUP.size)
+            self.groups[tuple(material)] = offset
+        self.hits = 0
+
+    def close(self):
+        self.data.close()
+
+    def probe(self, position, white_to_move):  # plies to the end of the game (even: side to move loses), DRAW, or None
+        if not isinstance(position, BitBoard):
+            if position.white_left + position.red_left > self.pieces:
+                return None
+            position = BitBoard.from_board(position)
+        elif (position.white | position.red).bit_count() > self.pieces:
+            return None
+        masks = _split(position)
+        offset = self.groups.get(_material(masks))
+        if offset is None:
+            return None
+        self.hits += 1
+        return self.data[offset + _index(masks, white_to_move)]
+
+    def score(self, position, max_player):  # exact score for the search (white's point of view), or None
+        if position.winner() is not None:  # the side without pieces has lost, faster than any stored win
+            return WIN_SCORE if position.winner() == WHITE else -WIN_SCORE
+        plies = self.probe(position, bool(max_player))
+        if plies is None:
+            return None
+        if plies == DRAW:
+            return 0
+        score = WIN_SCORE - plies if plies % 2 else plies - WIN_SCORE  # for the side to move
+        return score if max_player else -score
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='build an endgame tablebase by retrograde analysis')
+    parser.add_argument('--pieces', type=int, default=3, help='largest number of pieces on the board')
+    parser.add_argument('--out', default='endgame.tb', help='file to write')
+    options = parser.parse_args(args)
+    write(options.out, generate(options.pieces), options.pieces)
+
+
+if __name__ == '__main__':
+    main()
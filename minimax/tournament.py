@@ -0,0 +1,208 @@
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from checkers.records import ArchiveWriter, GameRecord
+from minimax import algorithm, algorithm2
+from minimax.deepening import Budget, iterative_deepening
+from minimax.mcts import MCTS
+from minimax.transposition import TranspositionTable
+
+MAX_PLIES = 200  # a game that gets this long is a draw
+REPETITIONS = 3  # the same position with the same side to move this many times is a draw
+OPENING_PLIES = 4  # random moves played from the start position to vary the openings
+TABLE_SIZE_MB = 4  # transposition table per engine per game
+
+ENGINES = ('minimax', 'minimax2', 'deepening', 'pvs', 'mcts')  # algorithm.minimax at a depth, algorithm2.minimax at a depth, deepening for some seconds, deepening with pvs, mcts for some seconds
+TIMED = ('deepening', 'pvs', 'mcts')  # engines whose argument is seconds per move
+
+
+def parse_engine(spec):  # 'minimax:3', 'minimax2:5', 'deepening:0.1', 'pvs:0.1' or 'mcts:0.1' -> (kind, depth or seconds)
+    kind, _, arg = spec.partition(':')
+    if kind not in ENGINES or not arg:
+        raise ValueError('engine must look like minimax:DEPTH, minimax2:DEPTH, deepening:SECONDS, pvs:SECONDS or '
+                         'mcts:SECONDS, got %r' % spec)
+    return kind, float(arg) if kind in TIMED else int(arg)
+
+
+def engine_name(engine):
+    return '%s:%s' % engine
+
+
+def new_state(engine):  # what an engine keeps between its moves in one game: a table, or the mcts tree
+    return MCTS(engine[1]) if engine[0] == 'mcts' else TranspositionTable(TABLE_SIZE_MB)
+
+
+# play one move, returns (new position, nodes searched or None). table is new_state(engine), mcts counts playouts
+def choose_move(engine, position, color, table):
+    kind, arg = engine
+    max_player = color == WHITE
+    if kind == 'minimax':  # the plain minimax does not count its nodes
+        return algorithm.minimax(position, arg, max_player, None)[1], None
+    if kind == 'mcts':
+        return table.search(position, max_player)[1], table.playouts
+    if kind == 'minimax2':
+        budget = Budget()  # no limit, only counts the nodes
+        table.new_search()
+        new_position = algorithm2.minimax(position, arg, float('-inf'), float('inf'), max_player, None, table,
+                                          budget=budget)[1]
+    else:
+        budget = Budget(time_limit=arg)
+        new_position = iterative_deepening(position, max_player, None, table=table, budget=budget, pvs=kind == 'pvs')[1]
+    return new_position, budget.nodes
+
+
+def random_opening(rng, plies=OPENING_PLIES):  # position and side to move after a few random moves, None if someone got stuck
+    position, color = BitBoard(), RED  # red moves first, as in checkers.game
+    for _ in range(plies):
+        moves = position.get_all_moves(color)
+        if not moves:
+            return None
+        position = position.move(rng.choice(moves))
+        color = WHITE if color == RED else RED
+    return position, color
+
+
+# play one game between two engines from an opening and return its record: the result is 1, 0.5 or 0 from
+# the point of view of the engine playing red, moves are the (start, end, captured) moves played from the opening
+def play_game(red, white, opening, max_plies=MAX_PLIES):
+    position, color = BitBoard(*opening[:3]), opening[3]
+    engines = {RED: red, WHITE: white}
+    tables = {RED: new_state(red), WHITE: new_state(white)}
+    stats = {RED: [0, 0.0, 0, 0], WHITE: [0, 0.0, 0, 0]}  # moves, seconds, counted nodes, seconds spent on counted moves
+    seen = {}
+    played = []
+    result, reason = 0.5, 'move limit'
+    for _ in range(max_plies):
+        key = position.white, position.red, position.kings, color
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] >= REPETITIONS:
+            reason = 'repetition'
+            break
+        if position.winner() is not None or not position.get_all_moves(color):  # no pieces or no moves loses
+            result, reason = (0.0 if color == RED else 1.0), 'win'
+            break
+
+        start = time.perf_counter()
+        new_position, nodes = choose_move(engines[color], position, color, tables[color])
+        elapsed = time.perf_counter() - start
+        played.append(next(move for move in position.get_all_moves(color) if position.move(move) == new_position))
+        position = new_position
+        moves = stats[color]
+        moves[0] += 1
+        moves[1] += elapsed
+        if nodes is not None:
+            moves[2] += nodes
+            moves[3] += elapsed
+        color = WHITE if color == RED else RED
+
+    return {'red': engine_name(red), 'white': engine_name(white), 'result': result, 'reason': reason,
+            'opening': list(opening[:3]) + ['red' if opening[3] == RED else 'white'], 'stats': {'red': stats[RED], 'white': stats[WHITE]},
+            'moves': played}
+
+
+def schedule(engines, games, seed=0):  # round robin, every opening is played twice per pair with the colors swapped
+    rng = random.Random(seed)
+    jobs = []
+    for a, b in itertools.combinations(engines, 2):
+        for _ in range((games + 1) // 2):
+            opening = None
+            while opening is None:
+                opening = random_opening(rng)
+            position, color = opening
+            opening = position.white, position.red, position.kings, color
+            jobs.append((a, b, opening))
+            jobs.append((b, a, opening))
+    return jobs
+
+
+# play every game of the schedule on a process pool, appending each record to out (one json object per line)
+# as soon as it finishes, and return all the records. with an archive the moves go there (see checkers.records)
+# instead of into the json
+def run(engines, games, out, workers=None, seed=0, archive=None):
+    records = []
+    writer = ArchiveWriter(archive) if archive is not None else None
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out, 'a') as f:
+        futures = [pool.submit(play_game, red, white, opening) for red, white, opening in schedule(engines, games, seed)]
+        for future in as_completed(futures):
+            record = future.result()
+            if writer is not None:
+                opening = record['opening']
+                writer.write(GameRecord(BitBoard(*opening[:3]), RED if opening[3] == 'red' else WHITE,
+                                        [tuple(move) for move in record.pop('moves')], record['result']))
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            records.append(record)
+    if writer is not None:
+        writer.close()
+    return records
+
+
+def elo(wins, draws, losses):  # elo difference and its 95% interval (low, high) from a win/draw/loss count
+    games = wins + draws + losses
+    if not games:
+        return 0.0, float('-inf'), float('inf')
+    score = (wins + draws / 2) / games
+    deviation = math.sqrt((wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games)
+    margin = 1.96 * deviation / math.sqrt(games)
+    return _elo(score), _elo(score - margin), _elo(score + margin)
+
+
+def _elo(score):
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * math.log10(1 / score - 1)
+
+
+def report(records):  # win/draw/loss and elo for every pair, then speed for every engine
+    pairs = {}
+    speed = {}
+    for record in records:
+        red, white = record['red'], record['white']
+        a, b = sorted((red, white))
+        score = record['result'] if red == a else 1 - record['result']
+        counts = pairs.setdefault((a, b), [0, 0, 0])
+        counts[0 if score == 1 else 1 if score == 0.5 else 2] += 1
+        for side in ('red', 'white'):
+            moves, seconds, nodes, node_seconds = record['stats'][side]
+            total = speed.setdefault(record[side], [0, 0.0, 0, 0.0])
+            total[0] += moves
+            total[1] += seconds
+            total[2] += nodes
+            total[3] += node_seconds
+
+    lines = []
+    for (a, b), (wins, draws, losses) in sorted(pairs.items()):
+        diff, low, high = elo(wins, draws, losses)
+        lines.append('%s vs %s: +%d =%d -%d, elo %+.1f [%+.1f, %+.1f]' % (a, b, wins, draws, losses, diff, low, high))
+    for name, (moves, seconds, nodes, node_seconds) in sorted(speed.items()):
+        nps = '%.0f nodes/s' % (nodes / node_seconds) if node_seconds else 'nodes not counted'
+        lines.append('%s: %.4f s/move, %s' % (name, seconds / moves if moves else 0.0, nps))
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='play engines against each other without a window')
+    parser.add_argument('engines', nargs='+', type=parse_engine, help='minimax:DEPTH, minimax2:DEPTH, deepening:SECONDS, pvs:SECONDS or mcts:SECONDS')
+    parser.add_argument('--games', type=int, default=100, help='games per pair of engines')
+    parser.add_argument('--workers', type=int, default=None, help='processes to play on, default one per core')
+    parser.add_argument('--out', default='tournament.jsonl', help='file the game records are appended to')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random openings')
+    parser.add_argument('--archive', default=None, help='binary game archive the moves are appended to')
+    options = parser.parse_args(args)
+    if len(options.engines) < 2:
+        parser.error('need at least two engines')
+    print(report(run(options.engines, options.games, options.out, options.workers, options.seed,
+                     options.archive)))
+
+
+if __name__ == '__main__':
+    main()
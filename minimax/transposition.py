@@ -0,0 +1,59 @@
+from checkers.zobrist import SIDE
+
+EXACT, LOWER, UPPER = 0, 1, 2  # the stored score is the exact value, a lower bound (fail high) or an upper bound (fail low)
+ENTRY_SIZE = 144  # rough number of bytes one filled slot costs in python (key int, entry tuple and list slots)
+
+
+def position_key(position, max_player):  # zobrist hash of the position plus the side to move
+    return position.hash ^ SIDE if max_player else position.hash
+
+
+class TranspositionTable:  # fixed size hash table of search results, keep one alive between turns to reuse it
+    def __init__(self, size_mb=16):
+        slots = 1
+        while slots * 2 * ENTRY_SIZE <= size_mb * 1024 * 1024:  # largest power of two that fits the memory budget
+            slots *= 2
+        self.mask = slots - 1
+        self.keys = [0] * slots
+        self.entries = [None] * slots  # (depth, flag, score, best move, generation)
+        self.generation = 0
+        self.hits = self.probes = self.stores = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def new_search(self):  # call once per move so entries from earlier searches can be replaced first
+        self.generation += 1
+
+    def clear(self):
+        self.keys = [0] * len(self.keys)
+        self.entries = [None] * len(self.entries)
+        self.generation = 0
+
+    def probe(self, key):  # return (depth, flag, score, best move) stored for key, or None
+        self.probes += 1
+        index = key & self.mask
+        if self.keys[index] == key and self.entries[index] is not None:
+            self.hits += 1
+            return self.entries[index][:4]
+        return None
+
+    def peek(self, key):  # probe for readers outside the search, it leaves the hit rate alone
+        index = key & self.mask
+        entry = self.entries[index]
+        if self.keys[index] == key and entry is not None:
+            return entry[:4]
+        return None
+
+    def store(self, key, depth, flag, score, best):
+        # replacement policy: always take an empty slot, the same position, or an entry left over from an earlier
+        # search, otherwise keep whichever of the two results was searched deeper
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is not None and self.keys[index] != key and entry[4] == self.generation and entry[0] > depth:
+            return
+        if entry is not None and self.keys[index] == key and best is None:
+            best = entry[3]  # keep the old best move if this search did not find one
+        self.keys[index] = key
+        self.entries[index] = (depth, flag, score, best, self.generation)
+        self.stores += 1
@@ -0,0 +1,119 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from checkers import batch
+from checkers.evaluation import DEFAULT_WEIGHTS, WEIGHTS, load_weights, save_weights
+from checkers.records import read_archive
+
+# texel style tuning of the evaluation weights: every position of a set of finished games is turned into its row of
+# batch.features once, then the weights are fitted so that sigmoid(scale * evaluation) predicts the result of the
+# game the position came from, by minimising the logistic loss with full batch gradient steps (adam) on the whole
+# matrix. the evaluation is linear in the weights, so a step is two matrix products and no python runs per position
+SKIP_PLIES = 6  # opening positions say little about who wins
+FIXED = ('man',)  # weights left as they are, so scores stay in hundredths of a man
+EPOCHS = 2000
+RATE = 0.5  # adam step size, in weight units
+
+
+def extract(paths, skip_plies=SKIP_PLIES, quiet=True):  # (features, white's results) of every position of the archives
+    positions, results = [], []
+    for path in paths:
+        for game in read_archive(path):
+            if game.result is None:
+                continue
+            for ply, (position, turn) in enumerate(game.positions()):
+                if ply < skip_plies:
+                    continue
+                if quiet and position.get_jumpers(turn):  # the score of a position mid-exchange is not its value
+                    continue
+                positions.append((position.white, position.red, position.kings))
+                results.append(1 - game.result)  # records keep red's result, the evaluation is white's
+    rows = np.array(positions, dtype=np.uint64).reshape(-1, 3)
+    return batch.features(rows).astype(np.float64), np.array(results, dtype=np.float64)
+
+
+def load(paths, cache=None):  # extract, or read the matrix saved by an earlier run
+    if cache is not None and os.path.exists(cache):
+        data = np.load(cache)
+        return data['features'], data['results']
+    features, results = extract(paths)
+    if cache is not None:
+        np.savez(cache, features=features, results=results)
+    return features, results
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def loss(features, results, weights, scale):  # mean logistic loss (cross entropy) of the predicted results
+    predicted = np.clip(_sigmoid(scale * (features @ weights)), 1e-12, 1 - 1e-12)
+    return -np.mean(results * np.log(predicted) + (1 - results) * np.log(1 - predicted))
+
+
+def fit_scale(features, results, weights):  # the scale that fits the current weights best, by golden section search
+    low, high = -5.0, -1.0  # on log10 of the scale, which spans orders of magnitude
+    ratio = (5 ** 0.5 - 1) / 2
+    for _ in range(40):
+        a = high - ratio * (high - low)
+        b = low + ratio * (high - low)
+        if loss(features, results, weights, 10 ** a) < loss(features, results, weights, 10 ** b):
+            high = b
+        else:
+            low = a
+    return 10 ** ((low + high) / 2)
+
+
+# fit the weights (a dict like WEIGHTS) to the data and return the new ones, rounded to ints so the search keeps
+# integer scores. report(epoch, loss) is called every 100 epochs
+def tune(features, results, weights, epochs=EPOCHS, rate=RATE, fixed=FIXED, report=None):
+    w = np.array([weights[name] for name in batch.FEATURES], dtype=np.float64)
+    scale = fit_scale(features, results, w)
+    free = np.array([name not in fixed for name in batch.FEATURES])
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2 = 0.9, 0.999
+    for epoch in range(1, epochs + 1):
+        predicted = _sigmoid(scale * (features @ w))
+        gradient = scale * (features.T @ (predicted - results)) / len(results)
+        gradient[~free] = 0
+        m = beta1 * m + (1 - beta1) * gradient
+        v = beta2 * v + (1 - beta2) * gradient * gradient
+        w -= rate * (m / (1 - beta1 ** epoch)) / (np.sqrt(v / (1 - beta2 ** epoch)) + 1e-12)
+        if report is not None and epoch % 100 == 0:
+            report(epoch, loss(features, results, w, scale))
+    return {name: int(round(value)) for name, value in zip(batch.FEATURES, w)}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='tune the evaluation weights on the results of recorded games')
+    parser.add_argument('archives', nargs='+', help='game archives (checkers.records), e.g. from the tournament')
+    parser.add_argument('--out', default='weights.json', help='weights file the games load at startup')
+    parser.add_argument('--start', default=None, help='weights to start from, default the built in ones')
+    parser.add_argument('--cache', default=None, help='npz file for the feature matrix, reused if it exists')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--rate', type=float, default=RATE)
+    options = parser.parse_args(args)
+    if options.start is not None:
+        load_weights(options.start)
+
+    start = time.perf_counter()
+    features, results = load(options.archives, options.cache)
+    print('%d positions, %.1f s' % (len(results), time.perf_counter() - start))
+    w = np.array([WEIGHTS[name] for name in batch.FEATURES], dtype=np.float64)
+    print('loss before: %.5f' % loss(features, results, w, fit_scale(features, results, w)))
+    weights = tune(features, results, WEIGHTS, options.epochs, options.rate,
+                   report=lambda epoch, value: print('epoch %d: %.5f' % (epoch, value)))
+    w = np.array([weights[name] for name in batch.FEATURES], dtype=np.float64)
+    print('loss after: %.5f, %.1f s' % (loss(features, results, w, fit_scale(features, results, w)),
+                                        time.perf_counter() - start))
+    for name in DEFAULT_WEIGHTS:
+        print('%s: %d -> %d' % (name, WEIGHTS[name], weights[name]))
+    save_weights(options.out, weights)
+
+
+if __name__ == '__main__':
+    main()
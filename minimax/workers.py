@@ -0,0 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from minimax.transposition import TranspositionTable
+
+# process pools whose workers search with a transposition table (parallel, server, analysis). a job is a plain
+# tuple with the position as its three bitboard ints (white, red, kings), never Board/Piece objects, so it pickles
+# small. each worker process makes its table once when it starts and keeps it for every job it runs
+_table = None
+
+
+def _init_worker(size_mb):
+    global _table
+    _table = TranspositionTable(size_mb)
+
+
+def worker_table():  # the table of the worker process this runs in, None outside one
+    return _table
+
+
+def make_pool(workers, table_mb):  # workers=None is one per core
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(table_mb,))
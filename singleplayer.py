@@ -28,7 +28,7 @@ def main():
             print(game.winner())
             run = False
 
-        for event in pygame.event.get():
+        for event in game.events():
             if event.type == pygame.QUIT:  # terminate the main loop if the quit button is pressed
                 run = False
 